@@ -0,0 +1,344 @@
+# Version Macros for supporting projects that span multiple versions of Unreal.
+# https://github.com/sbseltzer/VersionMacros
+#
+# Copyright Sam Seltzer-Johnston 2026. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+# Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# Benchmark for the prebuild scripts.
+# Generates a synthetic plugin tree, runs Prebuild.py on it for each requested engine version and writes the timings
+# as JSON, so that changes to the prebuild scripts can be checked for performance regressions.
+#
+# Example:
+#   python PrebuildBenchmark.py --files 2000 --versions 5.3,4.27,4.27 --output Benchmark.json
+#
+# Each run reports its end-to-end wall time (including interpreter startup) along with the per-phase timings from the
+# profile Prebuild.py writes when the PrebuildProfile environment variable is set.
+# Runs happen in order on the same tree, so alternating versions measures replacement passes that change files, and
+# repeating a version measures passes where everything is already up to date.
+#
+# Afterwards, the fixed startup cost of the prebuild is measured --startup-runs times: the wall time of running
+# Prebuild.py --help (which exits once the scripts are loaded), and the wall time of a prebuild with nothing to do.
+#
+# This is a development tool. It is not run as part of the prebuild step.
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import tempfile
+import argparse
+import subprocess
+
+ScriptDir = os.path.dirname(os.path.abspath(__file__))
+PluginName = "PrebuildBenchmark"
+
+# Number of user macros added to MacroReplacements, and number of macros defined in the generated prebuild header
+NumUserMacros = 8
+NumHeaderMacros = 8
+
+# Filler lines that no replacement rule touches
+FillerLines = [
+    "\tint32 Value = 0;\n",
+    "\tif (Value > 0) { Value--; }\n",
+    "\t// Regular comment that mentions nothing of interest\n",
+    "\tFString Name = TEXT(\"Benchmark\");\n",
+    "\treturn Value;\n",
+    "\n",
+    "#include \"CoreMinimal.h\"\n",
+    "\tvoid Tick(float DeltaTime) override;\n",
+]
+
+# Non-ASCII lines, which exercise encoding detection
+NonAsciiLines = [
+    u"\t// Caf\u00e9 na\u00efve r\u00e9sum\u00e9\n",
+    u"\tFString Label = TEXT(\"\u00fcber\");\n",
+]
+
+# Codec name -> function encoding text for that codec
+Codecs = {
+    "utf-8": lambda text: text.encode("utf-8"),
+    "utf-8-sig": lambda text: text.encode("utf-8-sig"),
+    "utf-16": lambda text: text.encode("utf-16"),
+    "utf-16-be": lambda text: b'\xfe\xff' + text.encode("utf-16-be"),
+    "latin-1": lambda text: text.encode("latin-1"),
+    "ascii": lambda text: text.encode("ascii", "ignore"),
+}
+
+# Codec name -> function decoding data written by that codec
+Decoders = {
+    "utf-8": lambda data: data.decode("utf-8"),
+    "utf-8-sig": lambda data: data.decode("utf-8-sig"),
+    "utf-16": lambda data: data.decode("utf-16"),
+    "utf-16-be": lambda data: data[2:].decode("utf-16-be"),
+    "latin-1": lambda data: data.decode("latin-1"),
+    "ascii": lambda data: data.decode("ascii"),
+}
+
+# Matches the version marker lines generate_lines writes
+VersionMarkerPattern = re.compile(r'#if ([01]) // UE_VERSION_MINIMUM\(5, (\d+)\)')
+
+def parse_codec_mix(codec_mix):
+    weights = []
+    for item in codec_mix.split(","):
+        name, _, weight = item.partition(":")
+        name = name.strip()
+        if name not in Codecs:
+            raise argparse.ArgumentTypeError("Unknown codec '" + name + "' (expected one of " + ", ".join(sorted(Codecs)) + ")")
+        weights.append((name, float(weight or 1)))
+    return weights
+
+def parse_versions(versions):
+    parsed = []
+    for version in versions.split(","):
+        parts = version.strip().split(".")
+        if len(parts) < 2 or len(parts) > 3 or not all(part.isdigit() for part in parts):
+            raise argparse.ArgumentTypeError("Invalid engine version '" + version + "' (expected Major.Minor[.Patch])")
+        parsed.append((parts + ["0"])[:3])
+    return parsed
+
+def choose_weighted(rng, weights):
+    total = sum(weight for _, weight in weights)
+    target = rng.uniform(0, total)
+    for name, weight in weights:
+        target -= weight
+        if target <= 0:
+            return name
+    return weights[-1][0]
+
+# Generates the lines of a single source file. Blocks are written in their UE5 form, so running the prebuild for a UE4
+# version converts them and running it for a UE5 version afterwards converts them back.
+def generate_lines(rng, opts):
+    lines = []
+    while len(lines) < opts.lines:
+        roll = rng.random()
+        if roll < opts.uproperty_density:
+            lines.append("\tUPROPERTY(EditAnywhere, Category = \"Benchmark\")\n")
+            if rng.random() < 0.5:
+                lines.append("\tTObjectPtr<UObject> Property%d;\n" % len(lines))
+            else:
+                lines.append("\tTObjectPtr<class UActorComponent> Component%d;\n" % len(lines))
+            continue
+        roll -= opts.uproperty_density
+        if roll < opts.objectptr_density:
+            lines.append("\tTObjectPtr<UObject> Local%d = GetOuter();\n" % len(lines))
+            continue
+        roll -= opts.objectptr_density
+        if roll < opts.version_marker_density:
+            minor = rng.randint(0, 5)
+            lines.append("#if %d // UE_VERSION_MINIMUM(5, %d)\n" % (rng.randint(0, 1), minor))
+            lines.append(rng.choice(FillerLines))
+            lines.append("#endif\n")
+            continue
+        roll -= opts.version_marker_density
+        if roll < opts.macro_marker_density:
+            if rng.random() < 0.5:
+                macro = "BENCHMARK_MACRO_%d" % rng.randrange(NumUserMacros)
+            else:
+                macro = "BENCHMARK_HEADER_MACRO_%d" % rng.randrange(NumHeaderMacros)
+            lines.append("#if %d // %s%s\n" % (rng.randint(0, 1), rng.choice(["", "!"]), macro))
+            lines.append(rng.choice(FillerLines))
+            lines.append("#endif\n")
+            continue
+        if rng.random() < 0.02:
+            lines.append(rng.choice(NonAsciiLines))
+        else:
+            lines.append(rng.choice(FillerLines))
+    return lines
+
+def generate_header(plugin_dir):
+    header_lines = ["#pragma once\n", "#include \"VersionMacros.h\"\n", "\n"]
+    for i in range(NumHeaderMacros):
+        if i % 2 == 0:
+            header_lines.append("#define BENCHMARK_HEADER_MACRO_%d UE_VERSION_MINIMUM(5, %d)\n" % (i, i % 6))
+        else:
+            header_lines.append("#define BENCHMARK_HEADER_MACRO_%d UE_VERSION_MAXIMUM(4, %d)\n" % (i, 20 + i))
+    header_dir = os.path.join(plugin_dir, "Source", PluginName, "Public")
+    os.makedirs(header_dir)
+    with open(os.path.join(header_dir, "Prebuild.h"), 'w') as f:
+        f.writelines(header_lines)
+
+def install_scripts(plugin_dir, scripts_dir):
+    dest_dir = os.path.join(plugin_dir, "Resources", "BuildScripts")
+    os.makedirs(dest_dir)
+    for name in ("Prebuild.py", "PrebuildCore.py", "PrebuildConfig.py", "PrebuildConst.py"):
+        shutil.copy2(os.path.join(scripts_dir, name), dest_dir)
+    # Add the user macros to the copy of the config
+    with open(os.path.join(dest_dir, "PrebuildConfig.py"), 'a') as f:
+        f.write("\n# Added by PrebuildBenchmark.py\n")
+        for i in range(NumUserMacros):
+            f.write("MacroReplacements[\"BENCHMARK_MACRO_%d\"] = \"UE_VERSION_MINIMUM(5, %d)\"\n" % (i, i % 6))
+
+# Generates a plugin tree with the given options under root_dir.
+# Returns the plugin directory, the total size of the source files and the (path, codec) of each generated header.
+def generate_tree(root_dir, opts):
+    rng = random.Random(opts.seed)
+    plugin_dir = os.path.join(root_dir, PluginName)
+    install_scripts(plugin_dir, opts.scripts)
+    generate_header(plugin_dir)
+    source_dir = os.path.join(plugin_dir, "Source", PluginName, "Private")
+    codec_weights = parse_codec_mix(opts.codecs)
+    num_dirs = max(1, opts.files // opts.files_per_dir)
+    total_bytes = 0
+    files = []
+    for i in range(opts.files):
+        file_dir = os.path.join(source_dir, "Module%d" % (i % num_dirs))
+        if not os.path.isdir(file_dir):
+            os.makedirs(file_dir)
+        is_header = i % 2 == 0
+        text = u"".join(generate_lines(rng, opts))
+        codec = choose_weighted(rng, codec_weights)
+        data = Codecs[codec](text)
+        file_path = os.path.join(file_dir, "File%d%s" % (i, ".h" if is_header else ".cpp"))
+        with open(file_path, 'wb') as f:
+            f.write(data)
+        total_bytes += len(data)
+        if is_header:
+            files.append((file_path, codec))
+    return plugin_dir, total_bytes, files
+
+# Returns the number of generated headers with a version marker that the prebuild didn't update for the given version.
+# Only headers are checked since that's where the prebuild replaces markers by default. This catches files whose
+# encoding was misdetected, since no replacements happen in those.
+def count_stale_files(files, version):
+    stale_files = 0
+    for file_path, codec in files:
+        with open(file_path, 'rb') as f:
+            text = Decoders[codec](f.read())
+        for match in VersionMarkerPattern.finditer(text):
+            expected = int((int(version[0]), int(version[1])) >= (5, int(match.group(2))))
+            if int(match.group(1)) != expected:
+                stale_files += 1
+                break
+    return stale_files
+
+def read_profile(plugin_dir):
+    profile_path = os.path.join(plugin_dir, "Intermediate", "Prebuild", "Profile.json")
+    try:
+        with open(profile_path) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+def run_prebuild(plugin_dir, version, opts, profile=True, args=()):
+    env = dict(os.environ)
+    env["PluginDir"] = plugin_dir
+    env["EngineDir"] = ""
+    env["UEMajorVersion"], env["UEMinorVersion"], env["UEPatchVersion"] = version
+    env["PrebuildProfile"] = profile and "1" or "0"
+    if opts.jobs != None:
+        env["PrebuildJobs"] = str(opts.jobs)
+    profile_path = os.path.join(plugin_dir, "Intermediate", "Prebuild", "Profile.json")
+    if os.path.exists(profile_path):
+        os.remove(profile_path)
+    command = [opts.python, os.path.join(plugin_dir, "Resources", "BuildScripts", "Prebuild.py")] + list(args)
+    start_time = time.time()
+    process = subprocess.Popen(command, cwd=plugin_dir, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    output = process.communicate()[0]
+    wall_time = time.time() - start_time
+    if process.returncode != 0:
+        sys.stderr.write(output.decode("utf-8", "replace"))
+    return {
+        "Version": ".".join(version),
+        "ExitCode": process.returncode,
+        "WallTime": wall_time,
+        "Profile": profile and read_profile(plugin_dir) or None
+    }
+
+def measure_startup(plugin_dir, version, opts):
+    launch_times = []
+    no_op_wall_times = []
+    for i in range(opts.startup_runs):
+        # --help exits as soon as the arguments are parsed, which is after the scripts and PrebuildConfig.py are loaded
+        run = run_prebuild(plugin_dir, version, opts, False, ["--help"])
+        if run["ExitCode"] == 0:
+            launch_times.append(run["WallTime"])
+        run = run_prebuild(plugin_dir, version, opts, False)
+        if run["ExitCode"] == 0:
+            no_op_wall_times.append(run["WallTime"])
+    return {
+        "LaunchTimes": launch_times,
+        "LaunchTime": launch_times and min(launch_times) or None,
+        "NoOpWallTimes": no_op_wall_times,
+        "NoOpWallTime": no_op_wall_times and min(no_op_wall_times) or None
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Prebuild.py on a synthetic plugin tree")
+    parser.add_argument("--files", type=int, default=500, help="number of source files to generate")
+    parser.add_argument("--lines", type=int, default=200, help="number of lines per source file")
+    parser.add_argument("--files-per-dir", type=int, default=50, help="number of source files per directory")
+    parser.add_argument("--uproperty-density", type=float, default=0.02, help="fraction of lines starting a UPROPERTY with a TObjectPtr member")
+    parser.add_argument("--objectptr-density", type=float, default=0.02, help="fraction of lines with a non-UPROPERTY TObjectPtr")
+    parser.add_argument("--version-marker-density", type=float, default=0.01, help="fraction of lines starting an #if N // UE_VERSION_* block")
+    parser.add_argument("--macro-marker-density", type=float, default=0.01, help="fraction of lines starting an #if N // <user macro> block")
+    parser.add_argument("--codecs", default="utf-8:8,utf-8-sig:1,utf-16:1,latin-1:1", help="weighted codec mix, e.g. utf-8:8,utf-16:1,latin-1:1")
+    parser.add_argument("--versions", default="5.3,4.27,4.27,5.3", help="comma separated engine versions to run the prebuild for, in order")
+    parser.add_argument("--jobs", type=int, default=None, help="value for the PrebuildJobs environment variable")
+    parser.add_argument("--startup-runs", type=int, default=5, help="number of times to measure the startup cost of the prebuild (0 to skip)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the generated tree")
+    parser.add_argument("--python", default=sys.executable, help="Python interpreter to run Prebuild.py with")
+    parser.add_argument("--scripts", default=ScriptDir, help="directory containing the prebuild scripts to benchmark")
+    parser.add_argument("--work-dir", default=None, help="directory to generate the tree in (defaults to a temporary directory)")
+    parser.add_argument("--keep", action="store_true", help="don't delete the generated tree")
+    parser.add_argument("--output", default=None, help="file to write the JSON results to (defaults to stdout)")
+    opts = parser.parse_args()
+    try:
+        versions = parse_versions(opts.versions)
+        parse_codec_mix(opts.codecs)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    work_dir = opts.work_dir or tempfile.mkdtemp(prefix="PrebuildBenchmark")
+    if opts.work_dir and os.path.exists(os.path.join(work_dir, PluginName)):
+        parser.error(os.path.join(work_dir, PluginName) + " already exists")
+    try:
+        start_time = time.time()
+        plugin_dir, total_bytes, files = generate_tree(work_dir, opts)
+        generate_time = time.time() - start_time
+        runs = []
+        for version in versions:
+            run = run_prebuild(plugin_dir, version, opts)
+            run["StaleFiles"] = count_stale_files(files, version)
+            runs.append(run)
+        startup = measure_startup(plugin_dir, versions[-1], opts)
+    finally:
+        if not opts.keep:
+            shutil.rmtree(os.path.join(work_dir, PluginName), ignore_errors=True)
+            if not opts.work_dir:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    options = dict(vars(opts))
+    for name in ("output", "work_dir", "keep"):
+        del options[name]
+    results = {
+        "Options": options,
+        "Tree": {"Files": opts.files, "Bytes": total_bytes, "GenerateTime": generate_time},
+        "Runs": runs,
+        "Startup": startup
+    }
+    text = json.dumps(results, indent=4, sort_keys=True)
+    if opts.output:
+        with open(opts.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if any(run["ExitCode"] != 0 or run["StaleFiles"] != 0 for run in runs):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,15 @@ ProcessDirs = [
     "Source"
 ]
 
+# List of regex patterns for directories to skip when searching ProcessDirs for source files
+# Patterns are matched against the full directory path with / separators. Matching directories are skipped entirely,
+# along with everything beneath them.
+ExcludeDirs = [
+    r'.*/ThirdParty$',
+    r'.*/Intermediate$',
+    r'.*/Binaries$',
+]
+
 # Optional list of header file paths to auto-generate `MacroReplacements` for.
 # It supports simple #define directives that use the UE_VERSION_* macros from VersionMacros.h
 # It also supports constant (1 or 0) values.
@@ -41,6 +50,55 @@ AllowDynamicVersionMacroReplacements = True
 # Whether to replace TObjectPtr<T> with T* on UE4 builds (includes annotation for reversibility)
 AllowObjectPtrReplacements = True
 
+# Whether to cache which source files are already up to date, so unchanged files can be skipped on subsequent builds
+# The cache is stored in <PluginDir>/Intermediate/Prebuild and is invalidated whenever the engine version, the prebuild
+# scripts (including this config), or any of the CustomPrebuildHeaders change
+UseScanCache = True
+
+# Whether the scan cache also keeps track of the lines in each source file that the replacements could change for any
+# engine version. When the engine version changes, source files that didn't change since then are brought up to date
+# by checking just those lines, and are only read if some of them need changing.
+UseMarkerIndex = True
+
+# Whether to cache the macros parsed from the CustomPrebuildHeaders, so they're only parsed again when they change
+# The cache is stored in <PluginDir>/Intermediate/Prebuild, with a separate entry for each engine version
+UseHeaderCache = True
+
+# Whether builds should hand their work to the prebuild daemon (started by running Prebuild.py with --daemon) if it's
+# running for the same engine version. Builds do the work themselves if it isn't.
+UseDaemon = True
+
+# How often (in seconds) the prebuild daemon checks the source files for changes
+DaemonPollInterval = 0.5
+
+# How long (in seconds) after a project-wide prebuild (Prebuild.py --project) this plugin's own prebuild is skipped
+# The project-wide prebuild runs before the plugin prebuilds in the same build, so this only needs to cover the gap
+ProjectPassMaxAge = 120
+
+# Source files at least this big (in bytes) are memory-mapped and only have the lines that need replacing decoded and
+# rewritten, rather than being decoded and rewritten in full. This helps with large generated or amalgamated headers.
+# UTF-16/32 files, and files with line endings that would be converted, are always processed in full. None disables it.
+BytePatchMinFileSize = 1024 * 1024
+
+# Minimum number of source files per worker process when processing source files in parallel
+# Worker processes take a while to start, so plugins with only a few source files are processed serially
+# Set the PrebuildJobs environment variable to override the number of worker processes (defaults to the CPU count)
+MinFilesPerJob = 32
+
+# How much the prebuild prints while it works
+# - "quiet" only prints warnings and errors
+# - "summary" also prints the number of lines changed in each source file, and the totals for the whole plugin
+# - "verbose" also prints the before/after text of every changed line
+# Set the PrebuildLogLevel environment variable to override this for a single build
+LogLevel = "summary"
+
+# Whether to write a unified diff of the changes made by the latest prebuild to
+# <PluginDir>/Intermediate/Prebuild/Changes.diff, which is a less noisy alternative to the "verbose" LogLevel
+WriteChangeDiff = False
+
+# Number of slowest source files to list in the profile written when the PrebuildProfile environment variable is set
+ProfileSlowestFileCount = 20
+
 # Default file patterns to perform replacements in
 MatchHeaderFiles = [r'.*\.h$', r'.*\.hpp$']
 MatchImplementationFiles = [r'.*\.cpp$', r'.*\.inl$', r'.*\.c$']
@@ -71,6 +129,30 @@ MacroReplacements = {
 }
 DefaultMacroReplacementFiles = MatchHeaderFiles
 
+# Custom version-specific text replacements, which are performed alongside the built-in ones
+# Use this for API changes between versions of Unreal that can be handled with a simple search and replace
+# Each rule is matched against one line at a time, and rules are applied in name order after the built-in replacements
+# Rules only apply in one direction, so pair them up (one for each side of the version) to be able to switch back
+CustomRules = {
+    # Example: FEditorStyle was replaced by FAppStyle in UE 5.1
+    # "EditorStyleToAppStyle": {
+    #     "Pattern": r'\bFEditorStyle::', # Regex to search each line for
+    #     "Replacement": "FAppStyle::", # What to replace matches with (\1 etc. refer to groups in the pattern, as in re.sub)
+    #     "Version": "5.1", # Version of Unreal to compare against
+    #     "Compare": '>=', # Comparison to make (in this case the rule applies when EngineVersion >= 5.1)
+    #     "MatchFiles": MatchAllSourceFiles, # (Optional) Files to restrict replacements to (defaults to all source files)
+    #     "Token": "FEditorStyle" # (Optional) Text that every match contains, which lets the prebuild skip lines and
+    #                             # files without it. Rules without one are tried on every line of every file!
+    # },
+    # "AppStyleToEditorStyle": {
+    #     "Pattern": r'\bFAppStyle::',
+    #     "Replacement": "FEditorStyle::",
+    #     "Version": "5.1",
+    #     "Compare": '<',
+    #     "Token": "FAppStyle"
+    # },
+}
+
 # Array of codec names to try using as the encoding option for io.open() when reading/writing source files
 # Unreal Engine generally uses UTF-8 by default, and Python is often able to gracefully handle this without assistance
 # If you run into Python errors that mention file decoding, you may need to specify those codecs here
@@ -0,0 +1,2688 @@
+# Version Macros for supporting projects that span multiple versions of Unreal.
+# https://github.com/sbseltzer/VersionMacros
+# 
+# Copyright Sam Seltzer-Johnston 2026. All Rights Reserved.
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+# rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+# Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+# COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+# OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+# GENERAL MAINTENANCE NOTES:
+# Avoid importing any nonstandard Python libraries.
+# All Python code must be forward/backward compatible between Python versions that ship with each Unreal Engine version.
+# Version Reference:
+#   UE 5.4-5.8 = Python 3.11.8
+#   UE 5.0-5.3 = Python 3.9.7
+#   UE 4.26-4.27 = Python 3.7.7
+#   UE 4.19-4.25 = Python 2.7.14
+#   UE 4.9-4.18 = Python 2.7.5
+# We can only support bundled Python versions down to UE 4.9, before which the engine did not ship with Python.
+# People compiling on Windows for versions of UE lower than that are expected to have Python in their PATH.
+# On POSIX conforming platforms (MacOS/Linux) we use the system Python install, which will generally be Python 3.x
+
+# This file is imported by Prebuild.py on every build (and by every worker process), so it doesn't do any work at import
+# time, and modules that aren't needed on every path (i.e. json, hashlib) are imported by the functions that use them.
+# Everything starts from main() at the bottom of this file.
+import os
+import sys
+import re
+import time
+
+from PrebuildConst import *
+import PrebuildConfig
+
+# Default values for the options that were added to PrebuildConfig.py over time, which plugins that updated Prebuild.py
+# but kept their customized PrebuildConfig.py don't have. These match the PrebuildConfig.py that ships with the scripts.
+# The options of each feature are added where the rest of its settings are declared.
+ConfigDefaults = {}
+
+# Sets any options a PrebuildConfig module doesn't have to their ConfigDefaults
+def apply_config_defaults(config_module):
+    for name, value in ConfigDefaults.items():
+        if not hasattr(config_module, name):
+            setattr(config_module, name, value)
+
+# Applies the custom macro names from PrebuildConfig, and the ConfigDefaults for any options it doesn't have
+def init_config():
+    global MacroPrefixName, MacroCommonName, MacroSuffixNames, OperatorStringToID
+    apply_config_defaults(PrebuildConfig)
+    # Ensure MacroPrefixName is up to date with custom user prefix name
+    if PrebuildConfig.MacroPrefixName != None:
+        MacroPrefixName = PrebuildConfig.MacroPrefixName
+    # Ensure MacroCommonName is up to date with custom user common name
+    if PrebuildConfig.MacroCommonName != None:
+        MacroCommonName = PrebuildConfig.MacroCommonName
+    # Ensure OperatorStringToID table is up to date with custom user suffix names
+    # These come from the constants PrebuildConfig imported, since project mode loads a separate copy for each plugin
+    OperatorStringToID = dict(PrebuildConfig.OperatorStringToID)
+    if PrebuildConfig.MacroSuffixNames != None:
+        MacroSuffixNames = PrebuildConfig.MacroSuffixNames
+        for i in range(1, len(MacroSuffixNames)):
+            OperatorStringToID[MacroSuffixNames[i]] = i
+
+# Environment Variables (set by PreBuildSteps in .uplugin file), which are read by read_environment()
+# PluginDir is used for source file path construction. Will assume current working directory if not set.
+PluginDir = os.path.curdir
+# You must either set EngineDir or UEMajorVersion/UEMinorVersion
+# EngineDir is used to deduce engine version when it isn't explicitly provided by UEMajorVersion/UEMinorVersion
+EngineDir = None
+MajorVersion = None
+MinorVersion = None
+PatchVersion = None
+# PrebuildJobs optionally overrides the number of worker processes used to process source files (1 = no parallelism)
+# Will use the CPU count if not set.
+PrebuildJobs = None
+# PrebuildProfile optionally writes a report of where the prebuild spent its time (set it to 1 to enable)
+PrebuildProfile = False
+# PrebuildLogLevel optionally overrides the LogLevel in PrebuildConfig (quiet, summary or verbose)
+PrebuildLogLevel = None
+
+def read_environment():
+    global EngineDir, MajorVersion, MinorVersion, PatchVersion, PrebuildJobs, PrebuildProfile, PrebuildLogLevel
+    set_plugin_dir(os.environ.get('PluginDir') or os.path.curdir)
+    EngineDir = os.environ.get('EngineDir')
+    MajorVersion = os.environ.get('UEMajorVersion')
+    MinorVersion = os.environ.get('UEMinorVersion')
+    PatchVersion = os.environ.get('UEPatchVersion')
+    PrebuildJobs = os.environ.get('PrebuildJobs')
+    PrebuildProfile = os.environ.get('PrebuildProfile', '') not in ('', '0')
+    PrebuildLogLevel = os.environ.get('PrebuildLogLevel')
+
+# Compiled versions of file pattern lists, keyed by the pattern list contents
+CompiledFilePatterns = {}
+
+def compile_file_patterns(pattern_list):
+    key = tuple(pattern_list)
+    compiled_patterns = CompiledFilePatterns.get(key)
+    if compiled_patterns == None:
+        compiled_patterns = [re.compile(pattern) for pattern in pattern_list]
+        CompiledFilePatterns[key] = compiled_patterns
+    return compiled_patterns
+
+def matches_any_pattern(path, pattern_list):
+    for pattern in compile_file_patterns(pattern_list):
+        if (pattern.match(path)):
+            return True
+    return False
+
+def is_file_eligible_for_replacements(file_path, pattern_list = None):
+    return matches_any_pattern(file_path, pattern_list or PrebuildConfig.MatchAllSourceFiles)
+
+# Log lines for the source file currently being processed.
+# These are buffered so that files processed in parallel don't interleave their output, and so the main process can
+# print them in path order. Set to None while no source file is being processed, in which case we print immediately.
+FileLog = None
+
+# Number of lines each replacement rule matched ([hits, changes]) in the source file currently being processed.
+# This is only collected when PrebuildProfile is set, and is None otherwise.
+FileRuleHits = None
+
+def count_rule_hit(rule, changed):
+    if FileRuleHits == None:
+        return
+    counts = FileRuleHits.get(rule)
+    if counts == None:
+        counts = FileRuleHits[rule] = [0, 0]
+    counts[0] += 1
+    if changed:
+        counts[1] += 1
+
+# Returns how much has been logged and counted for the source file currently being processed, for restore_file_log
+def save_file_log():
+    log_length = FileLog != None and len(FileLog) or 0
+    rule_hits = FileRuleHits != None and dict((rule, list(counts)) for rule, counts in FileRuleHits.items()) or None
+    return [log_length, rule_hits]
+
+# Undoes what was logged and counted for the current source file since save_file_log, for when the file is going to be
+# processed again by another path
+def restore_file_log(saved):
+    [log_length, rule_hits] = saved
+    if FileLog != None:
+        del FileLog[log_length:]
+    if rule_hits != None:
+        FileRuleHits.clear()
+        FileRuleHits.update(rule_hits)
+
+def log(message):
+    if FileLog != None:
+        FileLog.append(message)
+    else:
+        print(message)
+
+# Raised by print_error_and_exit while a source file is being processed (possibly in a worker process), so the main
+# process can flush that file's log before reporting the error and exiting.
+# Derives from BaseException so, just like exit(), it isn't swallowed by the `except Exception` handlers along the way.
+class PrebuildError(BaseException):
+    def __init__(self, message, source_file=None, line_num=None, exception_text=None):
+        BaseException.__init__(self, message, source_file, line_num, exception_text)
+        self.error_message = message
+        self.source_file = source_file
+        self.line_num = line_num
+        self.exception_text = exception_text
+
+def print_error_and_exit(message, source_file=None, line_num=None, exception=None):
+    exception_text = None
+    if exception != None:
+        import traceback
+        exception_text = "".join(traceback.format_exception_only(type(exception), exception))
+    error = PrebuildError(message, source_file, line_num, exception_text)
+    if FileLog != None:
+        raise error
+    exit_with_error(error)
+
+def exit_with_error(error):
+    print_str = ""
+    if (error.source_file != None):
+        print_str += error.source_file
+    if (error.line_num != None):
+        print_str += ":" + str(error.line_num)
+    if print_str != "":
+        print_str += " : "
+    print_str += error.error_message
+    print("ERROR: " + print_str)
+    if error.exception_text != None:
+        sys.stderr.write(error.exception_text)
+    exit(1)
+
+# Deduce engine version if not already provided by environment
+def deduce_engine_version():
+    if MajorVersion and MinorVersion:
+        return MajorVersion, MinorVersion, PatchVersion or "0"
+    if not EngineDir:
+        print_error_and_exit("EngineDir environment variable is required to find Build.version file!")
+    version_file_path = EngineDir + "/Build/Build.version"
+    if not os.path.exists(version_file_path):
+        print_error_and_exit("Failed to find engine version file!")
+    import json
+    with open(version_file_path) as f:
+        build_version = json.load(f)
+    return str(build_version['MajorVersion']), str(build_version['MinorVersion']), str(build_version['PatchVersion'])
+
+def version_to_int(major, minor, patch=None):
+    return int(major)*1000000+int(minor)*1000+int(patch or 0)
+
+# Results of comparisons against the engine version, keyed by (major, minor, patch, operator ID) integer tuples.
+# patch is None for comparisons that ignore the engine patch version. There's a table for each engine version (matrix
+# mode switches between them), and ComparisonTable is the one for the current engine version.
+# Tables are built with the results for every Major.Minor version of PrecomputedMajorVersions up front, which covers
+# nearly every marker line. Other comparisons (i.e. ones with a patch version) are added the first time they're made.
+ComparisonTables = {}
+ComparisonTable = {}
+PrecomputedMajorVersions = (4, 5)
+PrecomputedMinorVersionCount = 30
+# Set by set_engine_version()
+EngineVersion = None
+
+# Sets the engine version that comparisons are made against
+def set_engine_version(major, minor, patch):
+    global MajorVersion, MinorVersion, PatchVersion, EngineVersion, EngineVersionAsInt, EngineVersionAsIntWithPatch
+    global ComparisonTable
+    MajorVersion = major
+    MinorVersion = minor
+    PatchVersion = patch
+    EngineVersion = MajorVersion + "." + MinorVersion + "." + PatchVersion
+    EngineVersionAsInt = version_to_int(MajorVersion, MinorVersion)
+    EngineVersionAsIntWithPatch = version_to_int(MajorVersion, MinorVersion, PatchVersion)
+    ComparisonTable = ComparisonTables.get((EngineVersionAsInt, EngineVersionAsIntWithPatch))
+    if ComparisonTable == None:
+        ComparisonTable = ComparisonTables[(EngineVersionAsInt, EngineVersionAsIntWithPatch)] = build_comparison_table()
+
+# Builds the ComparisonTable for the engine version
+def build_comparison_table():
+    table = {}
+    for major in PrecomputedMajorVersions:
+        for minor in range(PrecomputedMinorVersionCount):
+            version_as_int = version_to_int(major, minor)
+            for compare_id in (EQUAL, BELOW, MAXIMUM, ABOVE, MINIMUM):
+                table[(major, minor, None, compare_id)] = compare_version_ints(EngineVersionAsInt, version_as_int, compare_id)
+    return table
+
+# Converts a comparison operator (name, symbol or ID) to its ID
+def get_operator_id(compare):
+    compare_id = (type(compare) == int) and compare or OperatorStringToID.get(compare)
+    if compare_id == None:
+        print_error_and_exit("Invalid comparison operator '" + str(compare) + "'!")
+    return compare_id
+
+# Compares the engine version against major.minor(.patch) using the operator with the given ID
+def compare_version(major, minor, patch, compare_id):
+    key = (major, minor, patch, compare_id)
+    result = ComparisonTable.get(key)
+    if result != None:
+        return result
+    if patch is None:
+        current_version = EngineVersionAsInt
+    else:
+        current_version = EngineVersionAsIntWithPatch
+    result = compare_version_ints(current_version, version_to_int(major, minor, patch), compare_id)
+    if result == None:
+        compare_name = compare_id in range(len(MacroSuffixNames)) and MacroSuffixNames[compare_id] or str(compare_id)
+        print_error_and_exit("Unhandled comparison operator: " + compare_name)
+    ComparisonTable[key] = result
+    return result
+
+# Compares two versions converted with version_to_int, returning None for operators that aren't simple comparisons
+# Versions are compared as integers to work around an edge case in UE4 where the minor version exceeded 9
+# For example: UE 4.9 is a lower version than UE 4.27, but a numeric comparison would evaluate to the opposite!
+def compare_version_ints(current_version, version_as_int, compare_id):
+    # Old versions of Unreal use Python 2, which doesn't have match statements, so we use if-else here
+    if compare_id == EQUAL:
+        return current_version == version_as_int
+    elif compare_id == BELOW:
+        return current_version < version_as_int
+    elif compare_id == MAXIMUM:
+        return current_version <= version_as_int
+    elif compare_id == ABOVE:
+        return current_version > version_as_int
+    elif compare_id == MINIMUM:
+        return current_version >= version_as_int
+    return None
+
+# Compares the engine version against a version string (or number) like "5.0" or "5.0.1"
+def do_comparison(version, compare):
+    # If version is a non-string (i.e. float or decimal) convert to string so we can separate the major/minor versions
+    if type(version) != str:
+        version = str(version)
+    if '.' not in version:
+        version += ".0"
+    parts = version.split('.', 2)
+    patch = None
+    if len(parts) == 3:
+        patch = int(parts[2])
+    return compare_version(int(parts[0]), int(parts[1]), patch, get_operator_id(compare))
+
+# Evaluates the arguments of a UE_VERSION_* macro, as parsed from a line of source code
+# A negative patch version is clamped to 0 unless allow_negative_patch is set.
+def evaluate_version_macro(comparison_name, is_negated, args, allow_negative_patch, file_path, line_num, error_suffix=""):
+    num_args = len(args)
+    if num_args == 2:
+        [major, minor] = args
+        return compare_version(int(major), int(minor), None, get_operator_id(comparison_name)) != is_negated
+    elif num_args == 3:
+        [major, minor, patch] = args
+        patch = int(patch)
+        if not allow_negative_patch:
+            patch = max(patch, 0)
+        return compare_version(int(major), int(minor), patch, get_operator_id(comparison_name)) != is_negated
+    elif num_args == 4 and (OperatorStringToID.get(comparison_name) == WITHIN):
+        [min_major, min_minor, max_major, max_minor] = args
+        return (compare_version(int(min_major), int(min_minor), None, MINIMUM) and compare_version(int(max_major), int(max_minor), None, MAXIMUM)) != is_negated
+    print_error_and_exit("Invalid number of arguments (" + str(num_args) + ")" + error_suffix, file_path, line_num)
+    return False
+
+# We start the list with UTF-8 as we'll always want to try that first
+ValidCodecs = []
+
+# Finds valid user-specified codecs and stores them in ValidCodecs global variable.
+def check_encodings():
+    if PrebuildConfig.SourceFileCodecs != None and len(PrebuildConfig.SourceFileCodecs) > 0:
+        missing_codecs = []
+        for enc in (PrebuildConfig.SourceFileCodecs):
+            if enc == None:
+                continue
+            try:
+                import encodings
+                codec_info = encodings.search_function(enc)
+                if codec_info is None:
+                    missing_codecs.append(enc)
+                else:
+                    ValidCodecs.append(codec_info.name)
+                    #print("Encoding '" + enc + "' found as '" + codec_info.name + "' in PrebuildConfig.SourceFileCodecs")
+            except Exception as e:
+                missing_codecs.append(enc)
+                pass
+        for enc in missing_codecs:
+            print("WARNING: Encoding '" + enc + "' specified in PrebuildConfig.SourceFileCodecs does not exist!")
+
+# Byte order marks we look for before trying each of the ValidCodecs in order.
+# Each entry is (BOM, codec family that must be in ValidCodecs, codec to decode the rest of the file with).
+# UTF-32 comes first since the UTF-32 LE BOM starts with the UTF-16 LE BOM.
+ByteOrderMarks = [
+    (b'\xff\xfe\x00\x00', 'utf-32', 'utf-32-le'),
+    (b'\x00\x00\xfe\xff', 'utf-32', 'utf-32-be'),
+    (b'\xef\xbb\xbf', 'utf-8', 'utf-8'),
+    (b'\xff\xfe', 'utf-16', 'utf-16-le'),
+    (b'\xfe\xff', 'utf-16', 'utf-16-be'),
+]
+
+def is_codec_family_allowed(family):
+    for enc in ValidCodecs:
+        if enc.startswith(family):
+            return True
+    return False
+
+# The endian-agnostic UTF-16/32 codecs need a BOM to know the byte order. Without one, decoding with them quietly assumes
+# little-endian (where io.open would have refused the file), so they're only used via ByteOrderMarks.
+def is_bom_only_codec(enc):
+    return enc == 'utf-16' or enc == 'utf-32'
+
+# Detects the encoding of a file from its raw bytes, returning the encoding and the decoded text.
+# The encoding is a (codec, BOM) pair. The BOM is stripped from the text and written back by encode_lines.
+# Codecs are validated against the whole file, so a file that only decodes part of the way isn't misdetected.
+def try_detect_encoding(file_path, data):
+    errors = PrebuildConfig.EncodingErrorHandling or 'strict'
+    for bom, family, enc in ByteOrderMarks:
+        if data.startswith(bom) and is_codec_family_allowed(family):
+            try:
+                return (enc, bom), data[len(bom):].decode(enc, errors)
+            except Exception:
+                log("WARNING: Couldn't use encoding=" + enc + " for " + file_path + " despite its byte order mark")
+            break
+    # Without any valid codecs we fall back to the default encoding, just like io.open
+    fallback_codecs = []
+    if len(ValidCodecs) == 0:
+        import locale
+        fallback_codecs = [locale.getpreferredencoding(False)]
+    for enc in ValidCodecs or fallback_codecs:
+        if is_bom_only_codec(enc):
+            continue
+        try:
+            return (enc, b''), data.decode(enc, errors)
+        except Exception:
+            log("WARNING: Couldn't use encoding=" + str(enc) + " for " + file_path)
+    print_error_and_exit("Failed to decode file with any of the encodings in PrebuildConfig.SourceFileCodecs", file_path)
+
+# Splits text into lines the same way io.open would when reading a file in text mode (i.e. universal newlines)
+def split_lines(text):
+    parts = text.replace(u'\r\n', u'\n').replace(u'\r', u'\n').split(u'\n')
+    lines = [part + u'\n' for part in parts[:-1]]
+    if parts[-1]:
+        lines.append(parts[-1])
+    return lines
+
+# Encodes lines the same way io.open would when writing a file in text mode (i.e. newlines become os.linesep)
+def encode_lines(lines, encoding):
+    [enc, bom] = encoding
+    text = u"".join(lines)
+    if os.linesep != '\n':
+        text = text.replace(u'\n', os.linesep)
+    return bom + text.encode(enc, PrebuildConfig.EncodingErrorHandling or 'strict')
+
+# Compiles the regex patterns used for replacements. This only needs to happen once, after the effective macro prefix,
+# common, and suffix names are known.
+def compile_rules():
+    global HeaderVersionMacroPattern, HeaderConstantMacroPattern, DynamicMacroPattern, FakeMacroPattern
+    global ObjectPtrPattern, UPropertyForwardDeclaredRawPtrPattern, UPropertyRawPtrPattern
+    global AnnotatedForwardDeclaredRawPtrPattern, AnnotatedRawPtrPattern, UPropertyPattern
+    global IfZeroPattern, IfOnePattern, ElifZeroPattern, ElifOnePattern, LineEndingMismatchPattern
+    version_macro_name = MacroPrefixName + MacroCommonName
+    HeaderVersionMacroPattern = re.compile(r'#define\s+([\w_\d]+)\s+((!?)\s*' + version_macro_name + r'(\w+)\s*\(([\s\d,\-]+))')
+    HeaderConstantMacroPattern = re.compile(r'#define\s+([\w_\d]+)\s+([01])')
+    DynamicMacroPattern = re.compile(r'^\s*#\s*(el)?if\s+(\d)\s*//\s*(!?)' + version_macro_name + r'(\w+)\s*\(([\s\d,\-]+)\)')
+    FakeMacroPattern = re.compile(r'^\s*#\s*(el)?if\s+(\d)\s*//\s*(!?)(\w[\w\d_]+)')
+    ObjectPtrPattern = re.compile(r'TObjectPtr<([\s\w_:]+)>')
+    UPropertyForwardDeclaredRawPtrPattern = re.compile(r'class(\s+)(U[\w_:]+)\s*\*(\s*)')
+    UPropertyRawPtrPattern = re.compile(r'(U[\w_:]+)\s*\*(\s*)')
+    AnnotatedForwardDeclaredRawPtrPattern = re.compile(r'class(\s+)([\w_:]+)\s*\*\s*/\*\s*TObjectPtr\s*\*/')
+    AnnotatedRawPtrPattern = re.compile(r'([\w_:]+)\s*\*\s*/\*\s*TObjectPtr\s*\*/')
+    UPropertyPattern = re.compile(r'\s*UPROPERTY\s*\(.*')
+    IfZeroPattern = re.compile(r'#(\s*)if(\s+)0')
+    IfOnePattern = re.compile(r'#(\s*)if(\s+)1')
+    ElifZeroPattern = re.compile(r'#(\s*)elif(\s+)0')
+    ElifOnePattern = re.compile(r'#(\s*)elif(\s+)1')
+    # Line endings that encode_lines wouldn't write back as-is
+    LineEndingMismatchPattern = re.compile(os.linesep == '\n' and br'\r' or br'\r(?!\n)|(?<!\r)\n')
+    compile_custom_rules()
+    compile_marker_rules()
+    compile_version_rules()
+
+# Compiles the pattern that finds the lines any of the handlers could change for any engine version (see
+# find_marker_lines). It's the byte-level equivalent of LineTriggerPattern with every CustomRules entry active, and like
+# the file prefilter, it's looser than the line patterns (though it never matches across lines).
+def compile_marker_rules():
+    global ByteMarkerTriggerPattern, AllowMarkerIndex
+    marker_triggers = [br'#[^\w\n]*(?:el)?if[^\n]*//']
+    if PrebuildConfig.AllowObjectPtrReplacements:
+        marker_triggers += [br'TObjectPtr', br'UPROPERTY']
+    # Custom rules without an ASCII token could match any line, so source files can't be indexed (see get_marker_index)
+    AllowMarkerIndex = True
+    for rule_name, pattern, replacement, version, compare, token, match_files in CustomRules:
+        try:
+            token_bytes = token.encode('ascii')
+        except (AttributeError, UnicodeError):
+            token_bytes = None
+        if token_bytes == None:
+            AllowMarkerIndex = False
+            marker_triggers.append(br'^')
+        else:
+            marker_triggers.append(re.escape(token_bytes))
+    ByteMarkerTriggerPattern = re.compile(b'|'.join(marker_triggers), re.MULTILINE)
+
+# Compiles the parts of the rules that depend on the engine version. This needs to happen again if it changes.
+def compile_version_rules():
+    global IsObjectPtrBackport, FilePrefilterPattern, AllowFilePrefilter, LineTriggerPattern
+    global ActiveCustomRules, FileCustomRuleMatchesPath
+    IsObjectPtrBackport = do_comparison("5.0", BELOW)
+    ActiveCustomRules = [(rule_name, pattern, replacement, token, match_files) for rule_name, pattern, replacement, version, compare, token, match_files in CustomRules if do_comparison(version, compare)]
+    FileCustomRuleMatchesPath = None
+    # Lines that don't match this can't possibly be changed by any of the handlers, so they can skip them entirely
+    # NOTE: Lines that follow a UPROPERTY line are an exception, since those always need TObjectPtr handling
+    line_triggers = [r'^\s*#\s*(?:el)?if\s+\d\s*//']
+    # Files that don't contain any of these can't possibly be changed, so they can be skipped without being decoded.
+    # This is searched in raw bytes, so it's looser than the line patterns (i.e. \W rather than \s, since non-ASCII
+    # whitespace is always encoded as non-ASCII bytes).
+    file_triggers = [br'#\W*(?:el)?if[^\n]*//']
+    if PrebuildConfig.AllowObjectPtrReplacements:
+        line_triggers += [r'TObjectPtr', r'^\s*UPROPERTY\s*\(']
+        file_triggers.append(br'TObjectPtr')
+        if not IsObjectPtrBackport:
+            file_triggers.append(br'UPROPERTY')
+    # Custom rules can only be found by their token. Without one (or with one that isn't ASCII, so its bytes depend on
+    # the encoding) every line could need replacements.
+    AllowFilePrefilter = True
+    for rule_name, pattern, replacement, token, match_files in ActiveCustomRules:
+        try:
+            token_bytes = token.encode('ascii')
+        except (AttributeError, UnicodeError):
+            token_bytes = None
+        if token_bytes == None:
+            AllowFilePrefilter = False
+            line_triggers.append(r'')
+        else:
+            line_triggers.append(re.escape(token))
+            file_triggers.append(re.escape(token_bytes))
+    LineTriggerPattern = re.compile('|'.join(line_triggers))
+    FilePrefilterPattern = re.compile(b'|'.join(file_triggers))
+    for enc in ValidCodecs:
+        if not is_file_prefilter_compatible_codec(enc):
+            AllowFilePrefilter = False
+
+# The file prefilter expects ASCII characters to be encoded as-is, which holds for UTF-8, Latin-1, etc.
+# UTF-16/32 are also fine, because ASCII text encoded with them always contains NUL bytes, and we don't prefilter those.
+def is_file_prefilter_compatible_codec(enc):
+    if enc.startswith('utf-16') or enc.startswith('utf-32'):
+        return True
+    sample = u"#elif TObjectPtr UPROPERTY //"
+    try:
+        return sample.encode(enc) == sample.encode('ascii')
+    except Exception:
+        return False
+
+def could_need_replacements(data):
+    if not AllowFilePrefilter or data.find(b'\x00') != -1:
+        return True
+    return FilePrefilterPattern.search(data) != None
+
+# Macros defined by the CustomPrebuildHeaders, as {macro name: whether it's enabled for the engine version}
+# These take precedence over MacroReplacements of the same name (though they still use its MatchFiles).
+HeaderMacros = {}
+
+def parse_prebuild_header_line(line, file_path, line_num):
+    match = HeaderVersionMacroPattern.search(line)
+    if match:
+        macro_name = match.group(1)
+        is_negated = match.group(3) == '!'
+        comparison_name = match.group(4)
+        args_string = match.group(5)
+        args = args_string.split(',', 3)
+        version_matches = evaluate_version_macro(comparison_name, is_negated, args, True, file_path, line_num, " for " + macro_name)
+        HeaderMacros[macro_name] = version_matches
+        # print("Registered Macro Replacement: " + macro_name + " = " + str(version_matches) + " | " + line)
+    else:
+        match = HeaderConstantMacroPattern.search(line)
+        if match:
+            macro_name = match.group(1)
+            constant_value = match.group(2)
+            HeaderMacros[macro_name] = bool(int(constant_value))
+            # print("Registered Macro Replacement: " + macro_name + " = " + str(bool(int(constant_value))) + " | " + line)
+
+# Reads and decodes the lines of a prebuild header, unless the caller already read its data
+def read_prebuild_header(path, data=None):
+    try:
+        if data == None:
+            with open(path, 'rb') as f:
+                data = f.read()
+        [use_encoding, text] = try_detect_encoding(path, data)
+        return split_lines(text)
+    except Exception as e:
+        print_error_and_exit("Failed to open prebuild header file - Check CustomPrebuildHeaders in PrebuildConfig.py and make you've entered a valid file path relative to this plugin.", path, None, e)
+
+def parse_prebuild_header_lines(path, lines):
+    line_num = 1
+    for line in lines:
+        try:
+            parse_prebuild_header_line(line, path, line_num)
+        except Exception as e:
+            print_error_and_exit("Failed to parse prebuild header line: " + line, path, line_num, e)
+        finally:
+            line_num = line_num + 1
+
+def parse_prebuild_header(path):
+    parse_prebuild_header_lines(path, read_prebuild_header(path))
+
+# MacroReplacements resolved by compile_macro_replacements(), as {macro name: (enabled, matcher index)}
+# The matcher index refers to MacroFileMatchers, which holds the distinct MatchFiles pattern lists (as tuples). Most
+# macros use DefaultMacroReplacementFiles, so whether a file is eligible for them only needs to be worked out once.
+MacroReplacementTable = {}
+MacroFileMatchers = ()
+
+# Whether the source file currently being processed matches each of the MacroFileMatchers (None until it's checked)
+FileMacroMatches = []
+FileMacroMatchesPath = None
+
+def set_macro_replacements(macro_replacement_table, macro_file_matchers):
+    global MacroReplacementTable, MacroFileMatchers, FileMacroMatchesPath
+    MacroReplacementTable = macro_replacement_table
+    MacroFileMatchers = macro_file_matchers
+    FileMacroMatchesPath = None
+
+# Works out whether a MacroReplacements entry is enabled for the engine version
+def evaluate_macro_replacement(macro_name, replacement_info):
+    value = replacement_info
+    if type(replacement_info) == dict:
+        value = replacement_info.get("Value")
+        if value == None:
+            replacement_version = replacement_info.get('Version')
+            if not replacement_version:
+                print_error_and_exit("Macro Replacement " + macro_name + " is missing 'Version' value!")
+            compare_type = replacement_info.get('Compare')
+            if not compare_type:
+                print_error_and_exit("Macro Replacement " + macro_name + " is missing 'Compare' value!")
+            if type(compare_type) != int and OperatorStringToID.get(compare_type) == None:
+                print_error_and_exit("Macro Replacement " + macro_name + " has an invalid 'Compare' value: " + repr(compare_type))
+            return do_comparison(replacement_version, compare_type)
+    if type(value) == bool:
+        return value
+    if type(value) == int:
+        return value != 0
+    if type(value) == str:
+        if value.strip().isdigit():
+            return int(value) != 0
+        # Otherwise it should be a UE_VERSION_* macro, the same as it would be in a prebuild header
+        match = HeaderVersionMacroPattern.search("#define " + macro_name + " " + value)
+        if match:
+            return evaluate_version_macro(match.group(4), match.group(3) == '!', match.group(5).split(',', 3), True, None, None, " for Macro Replacement " + macro_name)
+    print_error_and_exit("Macro Replacement " + macro_name + " has an invalid value: " + repr(value))
+    return False
+
+# Resolves PrebuildConfig.MacroReplacements and the HeaderMacros into the MacroReplacementTable
+# This is done up front, so any invalid entries are reported before we start modifying source files.
+def compile_macro_replacements():
+    macro_replacement_table = {}
+    macro_file_matchers = []
+    macro_names = set(PrebuildConfig.MacroReplacements) | set(HeaderMacros)
+    for macro_name in sorted(macro_names):
+        replacement_info = PrebuildConfig.MacroReplacements.get(macro_name)
+        match_files = type(replacement_info) == dict and replacement_info.get('MatchFiles') or PrebuildConfig.DefaultMacroReplacementFiles or []
+        if type(match_files) not in (list, tuple):
+            print_error_and_exit("Macro Replacement " + macro_name + " has an invalid 'MatchFiles' value (expected a list of file patterns)!")
+        match_files = tuple(match_files)
+        try:
+            compile_file_patterns(match_files)
+        except Exception as e:
+            print_error_and_exit("Macro Replacement " + macro_name + " has an invalid 'MatchFiles' pattern!", None, None, e)
+        if match_files not in macro_file_matchers:
+            macro_file_matchers.append(match_files)
+        if macro_name in HeaderMacros:
+            enabled = HeaderMacros[macro_name]
+        else:
+            try:
+                enabled = evaluate_macro_replacement(macro_name, replacement_info)
+            except Exception as e:
+                print_error_and_exit("Macro Replacement " + macro_name + " could not be evaluated!", None, None, e)
+        macro_replacement_table[macro_name] = (enabled, macro_file_matchers.index(match_files))
+    set_macro_replacements(macro_replacement_table, tuple(macro_file_matchers))
+
+# Whether a source file is eligible for the macros that use one of the MacroFileMatchers
+def is_file_eligible_for_macros(file_path, matcher_index):
+    global FileMacroMatches, FileMacroMatchesPath
+    if file_path != FileMacroMatchesPath:
+        FileMacroMatches = [None] * len(MacroFileMatchers)
+        FileMacroMatchesPath = file_path
+    eligible = FileMacroMatches[matcher_index]
+    if eligible == None:
+        match_files = MacroFileMatchers[matcher_index]
+        eligible = len(match_files) == 0 or matches_any_pattern(file_path, match_files)
+        FileMacroMatches[matcher_index] = eligible
+    return eligible
+
+# PrebuildConfig.CustomRules compiled by compile_custom_rules(), in name order
+# Each entry is (rule name, compiled pattern, replacement, version, compare, token, file patterns)
+CustomRules = []
+# The CustomRules that apply to the engine version, as (rule name, compiled pattern, replacement, token, file patterns)
+ActiveCustomRules = []
+
+# Whether the source file currently being processed matches the file patterns of each of the ActiveCustomRules
+FileCustomRuleMatches = []
+FileCustomRuleMatchesPath = None
+ConfigDefaults["CustomRules"] = {}
+
+# Compiles PrebuildConfig.CustomRules into CustomRules
+# This is done up front, so any invalid entries are reported before we start modifying source files.
+def compile_custom_rules():
+    global CustomRules
+    custom_rules = []
+    if type(PrebuildConfig.CustomRules) != dict:
+        print_error_and_exit("CustomRules should be a dictionary of rule names to rules!")
+    for rule_name in sorted(PrebuildConfig.CustomRules):
+        rule = PrebuildConfig.CustomRules[rule_name]
+        if type(rule) != dict:
+            print_error_and_exit("Custom Rule " + rule_name + " should be a dictionary!")
+        for key in ('Pattern', 'Replacement', 'Version', 'Compare'):
+            if rule.get(key) == None:
+                print_error_and_exit("Custom Rule " + rule_name + " is missing '" + key + "' value!")
+        compare_type = rule['Compare']
+        if type(compare_type) != int and OperatorStringToID.get(compare_type) == None:
+            print_error_and_exit("Custom Rule " + rule_name + " has an invalid 'Compare' value: " + repr(compare_type))
+        try:
+            do_comparison(rule['Version'], compare_type)
+        except Exception as e:
+            print_error_and_exit("Custom Rule " + rule_name + " has an invalid 'Version' value: " + repr(rule['Version']), None, None, e)
+        try:
+            pattern = re.compile(rule['Pattern'])
+        except Exception as e:
+            print_error_and_exit("Custom Rule " + rule_name + " has an invalid 'Pattern'!", None, None, e)
+        match_files = rule.get('MatchFiles') or PrebuildConfig.MatchAllSourceFiles
+        if type(match_files) not in (list, tuple):
+            print_error_and_exit("Custom Rule " + rule_name + " has an invalid 'MatchFiles' value (expected a list of file patterns)!")
+        match_files = tuple(match_files)
+        try:
+            compile_file_patterns(match_files)
+        except Exception as e:
+            print_error_and_exit("Custom Rule " + rule_name + " has an invalid 'MatchFiles' pattern!", None, None, e)
+        token = rule.get('Token')
+        if token != None:
+            if not isinstance(token, (str, type(u''))) or not token:
+                print_error_and_exit("Custom Rule " + rule_name + " has an invalid 'Token' value (expected a non-empty string): " + repr(token))
+            # Lines are unicode, so Python 2 tokens need decoding to be searched for in them
+            if not isinstance(token, type(u'')):
+                token = token.decode('utf-8')
+        custom_rules.append((rule_name, pattern, rule['Replacement'], rule['Version'], compare_type, token, match_files))
+    CustomRules = custom_rules
+
+# Whether a source file is eligible for the rule at rule_index in ActiveCustomRules
+def is_file_eligible_for_custom_rule(file_path, rule_index):
+    global FileCustomRuleMatches, FileCustomRuleMatchesPath
+    if file_path != FileCustomRuleMatchesPath:
+        FileCustomRuleMatches = [None] * len(ActiveCustomRules)
+        FileCustomRuleMatchesPath = file_path
+    eligible = FileCustomRuleMatches[rule_index]
+    if eligible == None:
+        eligible = matches_any_pattern(file_path, ActiveCustomRules[rule_index][4])
+        FileCustomRuleMatches[rule_index] = eligible
+    return eligible
+
+# Applies the ActiveCustomRules to a line, returning the new line and whether it changed
+# Replacements that leave the line as it was (i.e. the rule matches code that was already replaced) don't count.
+def handle_custom_rules(line, file_path, line_num):
+    new_line = line
+    for rule_index, [rule_name, pattern, replacement, token, match_files] in enumerate(ActiveCustomRules):
+        if token != None and token not in new_line:
+            continue
+        if not is_file_eligible_for_custom_rule(file_path, rule_index):
+            continue
+        try:
+            [replaced_line, num_replaced] = pattern.subn(replacement, new_line)
+        except Exception as e:
+            print_error_and_exit("Custom Rule " + rule_name + " failed to replace line `" + new_line + "`", file_path, line_num, e)
+        if num_replaced > 0:
+            count_rule_hit("Custom:" + rule_name, replaced_line != new_line)
+            new_line = replaced_line
+    return new_line, new_line != line
+
+# Lines that are already in the form the rule converts to (i.e. UPROPERTY raw pointers when backporting) count as rule
+# hits that didn't change, like fake macro lines that were already enabled/disabled. They're only looked for when
+# profiling.
+def handle_object_ptr_replacement(line, file_path, line_num, was_prev_line_uproperty):
+    new_line = line
+    changed = False
+    try:
+        if IsObjectPtrBackport:
+            # TObjectPtr backward-portability
+            if was_prev_line_uproperty:
+                # NOTE: The TObjectPtr rules for UPROPERTY are unambiguous, so we don't add an inline annotation for these conversions
+                [new_line, num_replaced] = ObjectPtrPattern.subn(r'\1*', new_line)
+            else:
+                [new_line, num_replaced] = ObjectPtrPattern.subn(r'\1* /* TObjectPtr */', new_line)
+            changed = num_replaced > 0
+            if changed:
+                count_rule_hit("ObjectPtrBackport", True)
+            elif FileRuleHits != None and ((was_prev_line_uproperty and UPropertyRawPtrPattern.search(line)) or AnnotatedRawPtrPattern.search(line)):
+                count_rule_hit("ObjectPtrBackport", False)
+        else:
+            # TObjectPtr forward-portability
+            if was_prev_line_uproperty:
+                # NOTE: The TObjectPtr rules for UPROPERTY are unambiguous, so we don't require an inline annotation for these conversions
+                [new_line, num_replaced] = UPropertyForwardDeclaredRawPtrPattern.subn(r'TObjectPtr<class\1\2>\3', new_line)
+                changed = num_replaced > 0
+                if not changed:
+                    [new_line, num_replaced] = UPropertyRawPtrPattern.subn(r'TObjectPtr<\1>\2', new_line)
+                    changed = num_replaced > 0
+            if not changed:
+                [new_line, num_replaced] = AnnotatedForwardDeclaredRawPtrPattern.subn(r'TObjectPtr<class\1\2>', new_line)
+                changed = num_replaced > 0
+            if not changed:
+                [new_line, num_replaced] = AnnotatedRawPtrPattern.subn(r'TObjectPtr<\1>', new_line)
+                changed = num_replaced > 0
+            if changed:
+                count_rule_hit("ObjectPtrForward", True)
+            elif FileRuleHits != None and ObjectPtrPattern.search(line):
+                count_rule_hit("ObjectPtrForward", False)
+    except Exception as e:
+        print_error_and_exit("Failed to handle TObjectPtr replacements for line `" + line + "`", file_path, line_num, e)
+    return new_line, changed
+
+# Flips the literal expression of a fake macro line (i.e. `#if 0 // MACRO` -> `#if 1 // MACRO`) to match its evaluated
+# value, returning the new line and whether it changed.
+def set_fake_macro_line_enabled(line, is_elif, current_literal_expression, enabled):
+    if enabled:
+        if (current_literal_expression == 0):
+            if is_elif:
+                return ElifZeroPattern.sub(r'#\1elif\g<2>1', line), True
+            return IfZeroPattern.sub(r'#\1if\g<2>1', line), True
+    else:
+        if (current_literal_expression == 1):
+            if is_elif:
+                return ElifOnePattern.sub(r'#\1elif\g<2>0', line), True
+            return IfOnePattern.sub(r'#\1if\g<2>0', line), True
+    return line, False
+
+# NOTE: Only header files benefit from this kind of fake macro replacement, so should_replace is determined per-file
+def handle_dynamic_fake_macro_replacement(line, file_path, line_num, should_replace):
+    new_line = line
+    changed = False
+    is_dynamic_macro_replacement = False
+    if should_replace:
+        match = DynamicMacroPattern.search(new_line)
+        if match:
+            elif_prefix = match.group(1)
+            is_dynamic_macro_replacement = True
+            current_literal_expression = int(match.group(2))
+            is_negated = match.group(3) == '!'
+            comparison_name = match.group(4)
+            args_string = match.group(5)
+            args = args_string.split(',', 3)
+            version_matches = evaluate_version_macro(comparison_name, is_negated, args, False, file_path, line_num)
+            [new_line, changed] = set_fake_macro_line_enabled(new_line, elif_prefix != None, current_literal_expression, version_matches)
+            count_rule_hit("DynamicVersionMacro", changed)
+    return new_line, changed, is_dynamic_macro_replacement
+
+def handle_fake_macro_replacement(line, file_path, line_num):
+    new_line = line
+    changed = False
+    match = FakeMacroPattern.search(new_line)
+    # Search the dictionary of user-defined macros that are associated with a version and comparison
+    if match:
+        elif_prefix = match.group(1)
+        current_literal_expression = int(match.group(2))
+        is_negated = match.group(3) == '!'
+        macro_text = match.group(4)
+        replacement = MacroReplacementTable.get(macro_text)
+        if replacement == None:
+            log("Warning: Failed to find Macro Replacement Info for " + macro_text + " " + file_path + ":" + str(line_num))
+        else:
+            [enabled, matcher_index] = replacement
+            if is_file_eligible_for_macros(file_path, matcher_index):
+                [new_line, changed] = set_fake_macro_line_enabled(new_line, elif_prefix != None, current_literal_expression, enabled != is_negated)
+                count_rule_hit("Macro:" + macro_text, changed)
+    return new_line, changed
+
+# How much the prebuild prints (see LogLevel in PrebuildConfig.py). Warnings, errors and the results of check and
+# matrix mode are always printed.
+LogLevels = ("quiet", "summary", "verbose")
+LogLevel = "summary"
+ConfigDefaults["LogLevel"] = "summary"
+# Whether to log the before/after text of each changed line. This is only done at the verbose log level, and never in
+# check or matrix mode, which report their changes differently.
+LogLineChanges = False
+
+def set_log_level(log_level):
+    global LogLevel, LogLineChanges
+    if log_level not in LogLevels:
+        print("WARNING: Ignoring invalid log level '" + str(log_level) + "' (expected one of " + ", ".join(LogLevels) + ")")
+        log_level = "summary"
+    LogLevel = log_level
+    LogLineChanges = LogLevel == "verbose"
+
+def replace_line_in_file(file_path, line_num, line, was_prev_line_uproperty, allow_dynamic_macros):
+    changed = False
+    new_line = line
+    is_dynamic_macro_replacement = False
+    try:
+        # TObjectPtr replacement
+        if PrebuildConfig.AllowObjectPtrReplacements:
+            [new_line, obj_ptr_changed] = handle_object_ptr_replacement(new_line, file_path, line_num, was_prev_line_uproperty)
+            changed = changed or obj_ptr_changed
+        # Fake macro replacement (UE_VERSION_* form)
+        if PrebuildConfig.AllowDynamicVersionMacroReplacements:
+            [new_line, dyn_macro_changed, is_dynamic_macro_replacement] = handle_dynamic_fake_macro_replacement(new_line, file_path, line_num, allow_dynamic_macros)
+            changed = changed or dyn_macro_changed
+        # Fake macro replacement (user-defined form)
+        if not is_dynamic_macro_replacement:
+            [new_line, fake_macro_changed] = handle_fake_macro_replacement(new_line, file_path, line_num)
+            changed = changed or fake_macro_changed
+        # User-defined rules
+        if ActiveCustomRules:
+            [new_line, custom_rule_changed] = handle_custom_rules(new_line, file_path, line_num)
+            changed = changed or custom_rule_changed
+        if (changed and LogLineChanges):
+            log(file_path + ":" + str(line_num) + "\nChanged:\n  " + line + "To:\n  " + new_line)
+    except Exception as e:
+        print_error_and_exit("Exception while processing line `" + line + "`", file_path, line_num, e)
+    return new_line, changed
+
+# Directory for files generated by the prebuild scripts (caches, reports, etc.), and the paths of those files
+# These all depend on PluginDir, so they're set by set_plugin_dir()
+PrebuildIntermediateDir = None
+ScanCachePath = None
+HeaderCachePath = None
+ProfilePath = None
+DaemonPath = None
+ChangeDiffPath = None
+ProjectPassPath = None
+LockPath = None
+SharedResultPath = None
+# Name of the plugin, which is substituted for {PluginName} in the paths in PrebuildConfig
+PluginName = None
+
+def set_plugin_dir(plugin_dir):
+    global PluginDir, PluginName, PrebuildIntermediateDir, ScanCachePath, HeaderCachePath, ProfilePath, DaemonPath
+    global ChangeDiffPath, ProjectPassPath, LockPath, SharedResultPath
+    PluginDir = plugin_dir
+    PluginName = os.path.basename(PluginDir)
+    PrebuildIntermediateDir = os.path.join(PluginDir, "Intermediate", "Prebuild")
+    ScanCachePath = os.path.join(PrebuildIntermediateDir, "ScanCache.json")
+    HeaderCachePath = os.path.join(PrebuildIntermediateDir, "HeaderCache.json")
+    ProfilePath = os.path.join(PrebuildIntermediateDir, "Profile.json")
+    DaemonPath = os.path.join(PrebuildIntermediateDir, "Daemon.json")
+    ChangeDiffPath = os.path.join(PrebuildIntermediateDir, "Changes.diff")
+    ProjectPassPath = os.path.join(PrebuildIntermediateDir, "ProjectPass.json")
+    LockPath = os.path.join(PrebuildIntermediateDir, "Prebuild.lock")
+    SharedResultPath = os.path.join(PrebuildIntermediateDir, "SharedResult.json")
+# Bump this whenever the format of the scan cache changes
+ScanCacheVersion = 2
+# Cached file timestamps this close to when the cache was saved can't be trusted (i.e. coarse filesystem timestamps)
+ScanCacheRacyWindow = 2.0
+ConfigDefaults["UseScanCache"] = True
+
+# Scan cache entries ({path: [size, mtime, sha1, marker index]}) for files known to be up to date for the current
+# fingerprint. The marker index of a file is [codec, marker lines] (see find_marker_lines), or None if it has none.
+# The mtime is None if it can't be trusted (see keep_unvisited_scan_cache_entries).
+ScanCache = {}
+ScanCacheTimestamp = 0.0
+# Entries for files visited this run, which replace ScanCache when saved (this drops deleted files from the cache)
+VisitedScanCache = {}
+# Scan cache entries saved for another engine version, but with the same index fingerprint. Their marker indexes are
+# still valid, which lets try_apply_marker_index bring the files up to date without processing them in full.
+MarkerIndex = {}
+ConfigDefaults["UseMarkerIndex"] = True
+
+def replace_file(src_path, dst_path):
+    # os.replace is atomic on all platforms, but doesn't exist in Python 2
+    if hasattr(os, 'replace'):
+        os.replace(src_path, dst_path)
+        return
+    try:
+        os.rename(src_path, dst_path)
+    except OSError:
+        # Windows won't rename over an existing file
+        os.remove(dst_path)
+        os.rename(src_path, dst_path)
+
+def hash_bytes(data):
+    import hashlib
+    return hashlib.sha1(data).hexdigest()
+
+# Fingerprint of everything besides the source files themselves that can affect the result of a replacement pass.
+# If any of these change, every source file needs to be rescanned.
+def get_scan_fingerprint(header_paths, index_fingerprint=None):
+    import hashlib
+    if index_fingerprint == None:
+        index_fingerprint = get_index_fingerprint(header_paths)
+    hasher = hashlib.sha1()
+    hasher.update(index_fingerprint.encode('ascii'))
+    hasher.update(str(EngineVersionAsIntWithPatch).encode('ascii'))
+    return hasher.hexdigest()
+
+# The scan fingerprint without the engine version. If any of these change, the marker indexes need rebuilding too.
+def get_index_fingerprint(header_paths):
+    import hashlib
+    hasher = hashlib.sha1()
+    hasher.update(str(ScanCacheVersion).encode('ascii'))
+    # Scripts are hashed by name rather than path, so a project-wide prebuild (which runs another plugin's copy of the
+    # scripts with this plugin's PrebuildConfig.py) gets the same fingerprint as the plugin's own prebuild
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    script_files = [os.path.join(script_dir, "PrebuildCore.py"), os.path.join(script_dir, "PrebuildConst.py"), get_config_path()]
+    for path in script_files + header_paths:
+        hasher.update((path in script_files and os.path.basename(path) or path).encode('utf-8'))
+        try:
+            with open(path, 'rb') as f:
+                hasher.update(f.read())
+        except (IOError, OSError):
+            hasher.update(b'<missing>')
+    return hasher.hexdigest()
+
+# Path of the PrebuildConfig.py in use (Python 2 reports the path of its .pyc file instead)
+def get_config_path():
+    return os.path.splitext(os.path.abspath(PrebuildConfig.__file__))[0] + ".py"
+
+# A cache saved for another engine version is only used for its marker indexes (see MarkerIndex)
+def load_scan_cache(fingerprint, index_fingerprint):
+    import json
+    global ScanCache, ScanCacheTimestamp, MarkerIndex
+    try:
+        with open(ScanCachePath) as f:
+            cache = json.load(f)
+    except (IOError, OSError, ValueError):
+        return
+    if type(cache) != dict:
+        return
+    if cache.get("Fingerprint") == fingerprint:
+        ScanCache = cache.get("Files") or {}
+    elif cache.get("IndexFingerprint") == index_fingerprint and PrebuildConfig.UseMarkerIndex:
+        MarkerIndex = cache.get("Files") or {}
+    else:
+        return
+    ScanCacheTimestamp = cache.get("Timestamp") or 0.0
+
+def save_scan_cache(fingerprint, index_fingerprint):
+    import json
+    cache = {
+        "Fingerprint": fingerprint,
+        "IndexFingerprint": index_fingerprint,
+        "Timestamp": time.time(),
+        "Files": VisitedScanCache
+    }
+    try:
+        if not os.path.isdir(PrebuildIntermediateDir):
+            os.makedirs(PrebuildIntermediateDir)
+        temp_path = ScanCachePath + "." + str(os.getpid()) + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(cache, f)
+        replace_file(temp_path, ScanCachePath)
+    except (IOError, OSError) as e:
+        print("WARNING: Failed to save prebuild scan cache to " + ScanCachePath + ": " + str(e))
+
+# Builds that only process some of the source files (see --files) keep the cache entries of the others. The cache gets a
+# new timestamp, so entries that were too close to the old one to be trusted lose their mtime instead, which makes the
+# next build check those files by content hash.
+def keep_unvisited_scan_cache_entries():
+    for file_path, entry in ScanCache.items():
+        if file_path in VisitedScanCache:
+            continue
+        if entry[1] != None and entry[1] + ScanCacheRacyWindow >= ScanCacheTimestamp:
+            entry = [entry[0], None] + entry[2:]
+        VisitedScanCache[file_path] = entry
+
+# NOTE: stat must be taken before reading data, so changes made after the read can't go unnoticed
+# The encoding and marker lines of the file are passed on to get_marker_index.
+def get_scan_cache_entry(file_path, stat=None, data=None, encoding=None, markers=None):
+    if stat == None:
+        stat = os.stat(file_path)
+    if data == None:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+    return [stat.st_size, stat.st_mtime, hash_bytes(data), get_marker_index(data, encoding, markers)]
+
+# Returns True if the file is known to already be up to date, which allows skipping it entirely.
+# Files whose size/mtime still match the cache are skipped without being opened. Otherwise, the content hash is checked.
+def try_skip_cached_file(file_path):
+    entry = ScanCache.get(file_path)
+    if entry == None:
+        return False
+    [size, mtime, content_hash, marker_index] = entry
+    stat = os.stat(file_path)
+    if stat.st_size != size:
+        return False
+    if stat.st_mtime == mtime and mtime + ScanCacheRacyWindow < ScanCacheTimestamp:
+        VisitedScanCache[file_path] = entry
+        return True
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    if hash_bytes(data) != content_hash:
+        return False
+    VisitedScanCache[file_path] = [stat.st_size, stat.st_mtime, content_hash, marker_index]
+    return True
+
+# Bump this whenever the format of the header cache, or the way prebuild headers are parsed, changes
+HeaderCacheVersion = 1
+# Number of parsed header sets to keep in the header cache (i.e. one for each engine version the plugin is built for)
+HeaderCacheMaxEntries = 8
+ConfigDefaults["UseHeaderCache"] = True
+
+# Key for the HeaderMacros parsed from the given header data. Besides the header contents, the result depends on the
+# engine version and the macro names the header parser looks for.
+def get_header_cache_key(header_data):
+    import hashlib
+    hasher = hashlib.sha1()
+    hasher.update(str(HeaderCacheVersion).encode('ascii'))
+    hasher.update(str(EngineVersionAsIntWithPatch).encode('ascii'))
+    hasher.update((MacroPrefixName + "|" + MacroCommonName).encode('utf-8'))
+    for name, compare_id in sorted(OperatorStringToID.items()):
+        hasher.update((name + "=" + str(compare_id) + "|").encode('utf-8'))
+    for path, data in header_data:
+        hasher.update(path.encode('utf-8'))
+        hasher.update(hash_bytes(data).encode('ascii'))
+    return hasher.hexdigest()
+
+def load_header_cache():
+    import json
+    try:
+        with open(HeaderCachePath) as f:
+            cache = json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+    if type(cache) != dict or cache.get("Version") != HeaderCacheVersion or type(cache.get("Entries")) != dict:
+        return {}
+    return cache["Entries"]
+
+def save_header_cache(entries):
+    import json
+    # Only keep the most recently added entries
+    keys = sorted(entries, key=lambda key: entries[key].get("Timestamp") or 0, reverse=True)
+    cache = {
+        "Version": HeaderCacheVersion,
+        "Entries": dict((key, entries[key]) for key in keys[:HeaderCacheMaxEntries])
+    }
+    try:
+        if not os.path.isdir(PrebuildIntermediateDir):
+            os.makedirs(PrebuildIntermediateDir)
+        temp_path = HeaderCachePath + "." + str(os.getpid()) + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(cache, f)
+        replace_file(temp_path, HeaderCachePath)
+    except (IOError, OSError) as e:
+        print("WARNING: Failed to save prebuild header cache to " + HeaderCachePath + ": " + str(e))
+
+# Parses the prebuild headers into HeaderMacros
+# With UseHeaderCache, the headers are only read and hashed, unless they haven't been parsed for this engine version yet.
+def parse_prebuild_headers(header_paths, update_cache=True):
+    if not PrebuildConfig.UseHeaderCache:
+        for path in header_paths:
+            parse_prebuild_header(path)
+        return
+    header_data = []
+    for path in header_paths:
+        try:
+            with open(path, 'rb') as f:
+                header_data.append((path, f.read()))
+        except (IOError, OSError) as e:
+            print_error_and_exit("Failed to open prebuild header file - Check CustomPrebuildHeaders in PrebuildConfig.py and make you've entered a valid file path relative to this plugin.", path, None, e)
+    key = get_header_cache_key(header_data)
+    entries = load_header_cache()
+    entry = entries.get(key)
+    if type(entry) == dict and type(entry.get("Macros")) == dict:
+        HeaderMacros.update(entry["Macros"])
+        return
+    for path, data in header_data:
+        parse_prebuild_header_lines(path, read_prebuild_header(path, data))
+    if update_cache:
+        entries[key] = {"Macros": dict(HeaderMacros), "Timestamp": time.time()}
+        save_header_cache(entries)
+
+# Performs replacements on the lines of a source file
+# Returns the new list of lines, or None if nothing changed. Lines are only copied once the first one changes.
+def replace_lines(file_path, lines):
+    allow_dynamic_macros = is_file_eligible_for_replacements(file_path, PrebuildConfig.DefaultMacroReplacementFiles)
+    new_lines = None
+    was_prev_line_uproperty = False
+    for index, line in enumerate(lines):
+        # Most lines can't be affected by any replacements, so we only run the line handlers on ones that might be
+        if was_prev_line_uproperty or LineTriggerPattern.search(line):
+            new_line, changed = replace_line_in_file(file_path, index + 1, line, was_prev_line_uproperty, allow_dynamic_macros)
+            was_prev_line_uproperty = UPropertyPattern.match(new_line) != None
+            if changed and new_lines == None:
+                new_lines = lines[:index]
+        else:
+            new_line = line
+            was_prev_line_uproperty = False
+        if new_lines != None:
+            new_lines.append(new_line)
+    return new_lines
+
+# Large source files (i.e. generated or amalgamated headers) are memory-mapped and patched at the byte level instead of
+# being decoded and re-encoded in full (see try_patch_file_bytes). This is the size of the pieces they're validated,
+# hashed and copied in, which bounds the memory used for them.
+BytePatchChunkSize = 1024 * 1024
+ConfigDefaults["BytePatchMinFileSize"] = 1024 * 1024
+
+# Whether the lines of a file encoded with a codec can be found and decoded on their own, which needs ASCII (and so line
+# breaks) to be encoded as-is
+def is_byte_patch_codec(enc):
+    return not enc.startswith('utf-16') and not enc.startswith('utf-32') and is_file_prefilter_compatible_codec(enc)
+
+# Returns the encoding that try_detect_encoding tries first for a file, or None if none of the ValidCodecs can be tried
+def get_first_encoding(data):
+    for mark, family, mark_enc in ByteOrderMarks:
+        if data[:len(mark)] == mark and is_codec_family_allowed(family):
+            return (mark_enc, mark)
+    for enc in ValidCodecs:
+        if not is_bom_only_codec(enc):
+            return (enc, b'')
+    return None
+
+# Returns the encoding the text path would detect for a memory-mapped file, or None if the file can't be patched at the
+# byte level. That's only the case for codecs that encode ASCII as-is (so lines can be found and decoded on their own),
+# and for files whose line endings are already what encode_lines would write.
+def get_byte_patch_encoding(data):
+    if LineEndingMismatchPattern.search(data) != None:
+        return None
+    encoding = get_first_encoding(data)
+    if encoding == None or not is_byte_patch_codec(encoding[0]):
+        return None
+    [enc, bom] = encoding
+    # The text path would move on to the next codec (or lose bytes with lenient EncodingErrorHandling) if this codec
+    # doesn't decode the whole file, so leave those files to it
+    import codecs
+    try:
+        decoder = codecs.getincrementaldecoder(enc)('strict')
+        for chunk_start in range(len(bom), len(data), BytePatchChunkSize):
+            decoder.decode(data[chunk_start:chunk_start + BytePatchChunkSize])
+        decoder.decode(b'', True)
+    except (UnicodeError, LookupError):
+        return None
+    return encoding
+
+def count_newlines(data, start, end):
+    count = 0
+    for chunk_start in range(start, end, BytePatchChunkSize):
+        count += data[chunk_start:min(end, chunk_start + BytePatchChunkSize)].count(b'\n')
+    return count
+
+# Finds and decodes the lines of a file that ByteMarkerTriggerPattern finds, and the lines that follow a UPROPERTY line.
+# These are the only lines that replace_lines could change for any engine version. Returns a list of [line number,
+# start offset, end offset, line] for each of them in file order, where the end offset excludes the line ending.
+def find_marker_lines(data, encoding):
+    [enc, bom] = encoding
+    errors = PrebuildConfig.EncodingErrorHandling or 'strict'
+    newline_length = len(os.linesep)
+    markers = []
+    [counted_offset, counted_line_num] = [0, 1]
+    line_end = -1
+    for match in ByteMarkerTriggerPattern.finditer(data, len(bom)):
+        # The rest of this line was already found
+        if match.start() <= line_end:
+            continue
+        line_start = max(len(bom), data.rfind(b'\n', 0, match.start()) + 1)
+        while True:
+            line_end = data.find(b'\n', line_start)
+            has_newline = line_end != -1
+            content_end = line_end + 1 - newline_length
+            if not has_newline:
+                line_end = len(data)
+                content_end = line_end
+            counted_line_num += count_newlines(data, counted_offset, line_start)
+            counted_offset = line_start
+            line = data[line_start:content_end].decode(enc, errors) + (has_newline and u'\n' or u'')
+            markers.append([counted_line_num, line_start, content_end, line])
+            if UPropertyPattern.match(line) == None or not has_newline:
+                break
+            line_start = line_end + 1
+    return markers
+
+# The byte-level equivalent of replace_lines, which only runs the line handlers on the marker lines of a file (see
+# find_marker_lines). Returns whether any line handler reported a change, and a list of (line number, start offset, end
+# offset, new bytes) patches for the lines whose text changed, in file order.
+# Returns None if a replacement turned a line into a UPROPERTY line, since the line after it may not be a marker line.
+# Nothing it logged or counted is kept in that case, so the file can go through the text path instead.
+def find_marker_patches(file_path, enc, markers):
+    errors = PrebuildConfig.EncodingErrorHandling or 'strict'
+    allow_dynamic_macros = is_file_eligible_for_replacements(file_path, PrebuildConfig.DefaultMacroReplacementFiles)
+    saved_log = save_file_log()
+    changed = False
+    patches = []
+    was_prev_line_uproperty = False
+    missing_line = False
+    prev_line_num = 0
+    for line_num, start, end, line in markers:
+        # Lines that follow a UPROPERTY line always need TObjectPtr handling, just like in replace_lines
+        if was_prev_line_uproperty and line_num != prev_line_num + 1:
+            missing_line = True
+            break
+        if was_prev_line_uproperty or LineTriggerPattern.search(line):
+            new_line, line_changed = replace_line_in_file(file_path, line_num, line, was_prev_line_uproperty, allow_dynamic_macros)
+            changed = changed or line_changed
+            if new_line != line:
+                new_content = new_line
+                if line.endswith(u'\n'):
+                    new_content = new_line[:-1]
+                patches.append((line_num, start, end, new_content.encode(enc, errors)))
+            was_prev_line_uproperty = UPropertyPattern.match(new_line) != None
+        else:
+            was_prev_line_uproperty = False
+        prev_line_num = line_num
+    if was_prev_line_uproperty and markers[-1][3].endswith(u'\n'):
+        missing_line = True
+    if missing_line:
+        restore_file_log(saved_log)
+        return None
+    return changed, patches
+
+# Yields the contents of a memory-mapped file with patches applied, in pieces no bigger than BytePatchChunkSize
+def iter_patched_chunks(data, patches):
+    position = 0
+    for line_num, start, end, new_bytes in patches + [(None, len(data), len(data), b'')]:
+        for chunk_start in range(position, start, BytePatchChunkSize):
+            yield data[chunk_start:min(start, chunk_start + BytePatchChunkSize)]
+        if new_bytes:
+            yield new_bytes
+        position = end
+
+# Writes patches (see find_marker_patches) to a memory-mapped file, and returns the hash of its new contents. If every
+# patch keeps the length of its line (i.e. `#if 0` -> `#if 1`), only the patched bytes are written, in place. Otherwise
+# the file is spliced together from the unchanged byte ranges and the new lines, and replaced like in replace_in_file.
+# The file is unmapped before it's written, since it can't be replaced while it's mapped on some platforms.
+# Unlike replacing the file, writing in place isn't atomic: if the prebuild is killed partway through, only some of the
+# patched lines are written. Each patch is a single write of a few bytes, and every line is left as either its old or
+# new text, so the next prebuild finishes the job (the file's timestamp changed, so its scan cache entry isn't used).
+def write_byte_patches(file_path, data, patches, result):
+    import hashlib
+    try:
+        # Read-only files (i.e. ones that aren't checked out) can still be replaced, like the text path does
+        in_place = all(len(new_bytes) == end - start for line_num, start, end, new_bytes in patches) and os.access(file_path, os.W_OK)
+        hasher = hashlib.sha1()
+        if in_place:
+            for chunk in iter_patched_chunks(data, patches):
+                hasher.update(chunk)
+            result["BytesWritten"] = sum(len(patch[3]) for patch in patches)
+        else:
+            temp_path = file_path + "." + str(os.getpid()) + ".new"
+            with open(temp_path, 'wb') as f:
+                for chunk in iter_patched_chunks(data, patches):
+                    f.write(chunk)
+                    hasher.update(chunk)
+                    result["BytesWritten"] += len(chunk)
+    finally:
+        data.close()
+    if in_place:
+        with open(file_path, 'r+b') as f:
+            for line_num, start, end, new_bytes in patches:
+                f.seek(start)
+                f.write(new_bytes)
+    else:
+        replace_file(temp_path, file_path)
+    return hasher.hexdigest()
+
+# Performs replacements in a file at least BytePatchMinFileSize bytes big without decoding all of it
+# Returns False if the file needs to go through the text path instead, see get_byte_patch_encoding.
+def try_patch_file_bytes(file_path, stat, result):
+    import mmap
+    phase_times = result["PhaseTimes"]
+    start_time = time.time()
+    with open(file_path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        result["BytesRead"] = len(data)
+        start_time = add_phase_time(phase_times, "Reading", start_time)
+        if not could_need_replacements(data):
+            result["Prefiltered"] = True
+            if PrebuildConfig.UseScanCache and not CheckOnly:
+                result["ScanCacheEntry"] = get_scan_cache_entry(file_path, stat, data)
+            add_phase_time(phase_times, "Prefiltering", start_time)
+            return True
+        start_time = add_phase_time(phase_times, "Prefiltering", start_time)
+        encoding = get_byte_patch_encoding(data)
+        start_time = add_phase_time(phase_times, "EncodingDetection", start_time)
+        if encoding == None:
+            return False
+        markers = find_marker_lines(data, encoding)
+        marker_patches = find_marker_patches(file_path, encoding[0], markers)
+        start_time = add_phase_time(phase_times, "Replacing", start_time)
+        if marker_patches == None:
+            return False
+        [changed, patches] = marker_patches
+        if not changed:
+            if PrebuildConfig.UseScanCache and not CheckOnly:
+                result["ScanCacheEntry"] = get_scan_cache_entry(file_path, stat, data, encoding, markers)
+            add_phase_time(phase_times, "ScanCacheHashing", start_time)
+            return True
+        result["Changed"] = True
+        result["ChangedLines"] = [patch[0] for patch in patches]
+        if CheckOnly:
+            return True
+        content_hash = write_byte_patches(file_path, data, patches, result)
+    finally:
+        # Closing it again after write_byte_patches is harmless
+        data.close()
+    start_time = add_phase_time(phase_times, "Writing", start_time)
+    if PrebuildConfig.UseScanCache:
+        new_stat = os.stat(file_path)
+        result["ScanCacheEntry"] = [new_stat.st_size, new_stat.st_mtime, content_hash, get_patched_marker_index(encoding[0], markers, patches)]
+    add_phase_time(phase_times, "ScanCacheHashing", start_time)
+    return True
+
+# Returns the marker index of a file's contents as [codec, marker lines] (see find_marker_lines), or None if the file
+# can't be indexed. Callers that already know the encoding of the file, or its marker lines, pass them in.
+# Only files in the encoding that try_detect_encoding tries first are indexed. Patching a file in another encoding could
+# change which encoding it's detected as (i.e. a Latin-1 file whose only invalid UTF-8 bytes were on a patched line),
+# which would make the marker index out of date.
+def get_marker_index(data, encoding=None, markers=None):
+    # AllowFilePrefilter is False if any of the ValidCodecs don't encode ASCII as-is
+    if not PrebuildConfig.UseMarkerIndex or not AllowMarkerIndex or not AllowFilePrefilter:
+        return None
+    if markers == None:
+        # Like the file prefilter, this can't find anything in UTF-16/32 files, so those are never indexed
+        if data.find(b'\x00') != -1:
+            return None
+        if ByteMarkerTriggerPattern.search(data) == None:
+            return [None, []]
+        if encoding == None or encoding != get_first_encoding(data):
+            encoding = get_byte_patch_encoding(data)
+        elif LineEndingMismatchPattern.search(data) != None or not is_byte_patch_codec(encoding[0]):
+            encoding = None
+        if encoding == None:
+            return None
+        markers = find_marker_lines(data, encoding)
+    return [encoding[0], markers]
+
+# Returns the marker index of a file after patches were written to it, or None if a patch inserted a line break
+def get_patched_marker_index(enc, markers, patches):
+    if not PrebuildConfig.UseMarkerIndex or not AllowMarkerIndex or not AllowFilePrefilter:
+        return None
+    errors = PrebuildConfig.EncodingErrorHandling or 'strict'
+    patched_markers = []
+    offset = 0
+    patch_index = 0
+    for line_num, start, end, line in markers:
+        if patch_index < len(patches) and patches[patch_index][0] == line_num:
+            new_bytes = patches[patch_index][3]
+            patch_index += 1
+            if b'\n' in new_bytes or b'\r' in new_bytes:
+                return None
+            new_line = new_bytes.decode(enc, errors) + (line.endswith(u'\n') and u'\n' or u'')
+            patched_markers.append([line_num, start + offset, start + offset + len(new_bytes), new_line])
+            offset += len(new_bytes) - (end - start)
+        else:
+            patched_markers.append([line_num, start + offset, end + offset, line])
+    return [enc, patched_markers]
+
+# Whether the marker lines of a MarkerIndex entry (see find_marker_lines) are still at the offsets it records in a file
+def marker_lines_match(data, enc, markers):
+    errors = PrebuildConfig.EncodingErrorHandling or 'strict'
+    newline = os.linesep.encode('ascii')
+    for line_num, start, end, line in markers:
+        if start > 0 and data[start - 1:start] != b'\n' and data.rfind(b'\n', 0, start) != -1:
+            return False
+        if line.endswith(u'\n'):
+            if data[end:end + len(newline)] != newline:
+                return False
+            line = line[:-1]
+        elif end != len(data):
+            return False
+        try:
+            if data[start:end].decode(enc, errors) != line:
+                return False
+        except UnicodeError:
+            return False
+    return True
+
+# Performs replacements in a file using its MarkerIndex entry, which is possible when the file hasn't changed since the
+# entry was made (i.e. when switching engine versions). Only the marker lines are run through the line handlers, and the
+# file is only read if they need patching, or if its timestamp can't be trusted (in which case its hash is checked).
+# Returns False if the file needs to be processed in full instead.
+def try_apply_marker_index(file_path, stat, result):
+    entry = MarkerIndex.get(file_path)
+    if entry == None or entry[3] == None or stat.st_size != entry[0]:
+        return False
+    [size, mtime, content_hash, marker_index] = entry
+    [enc, markers] = marker_index
+    phase_times = result["PhaseTimes"]
+    start_time = time.time()
+    if stat.st_mtime != mtime or mtime + ScanCacheRacyWindow >= ScanCacheTimestamp:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        result["BytesRead"] = len(data)
+        start_time = add_phase_time(phase_times, "Reading", start_time)
+        if hash_bytes(data) != content_hash:
+            return False
+    saved_log = save_file_log()
+    marker_patches = find_marker_patches(file_path, enc, markers)
+    start_time = add_phase_time(phase_times, "Replacing", start_time)
+    if marker_patches == None:
+        return False
+    [changed, patches] = marker_patches
+    if not changed:
+        result["MarkerIndexed"] = True
+        if PrebuildConfig.UseScanCache and not CheckOnly:
+            result["ScanCacheEntry"] = [stat.st_size, stat.st_mtime, content_hash, marker_index]
+        return True
+    import mmap
+    with open(file_path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        result["BytesRead"] = len(data)
+        # The file may have been edited without its size or timestamp changing, so make sure its marker lines are still
+        # where the entry says before trusting the changes (and writing at their offsets). If not, the file is processed
+        # in full instead, which finds its marker lines again.
+        if len(data) != size or not marker_lines_match(data, enc, markers):
+            restore_file_log(saved_log)
+            return False
+        start_time = add_phase_time(phase_times, "Reading", start_time)
+        result["MarkerIndexed"] = True
+        result["Changed"] = True
+        result["ChangedLines"] = [patch[0] for patch in patches]
+        if CheckOnly:
+            return True
+        content_hash = write_byte_patches(file_path, data, patches, result)
+    finally:
+        # Closing it again after write_byte_patches is harmless
+        data.close()
+    start_time = add_phase_time(phase_times, "Writing", start_time)
+    if PrebuildConfig.UseScanCache:
+        new_stat = os.stat(file_path)
+        result["ScanCacheEntry"] = [new_stat.st_size, new_stat.st_mtime, content_hash, get_patched_marker_index(enc, markers, patches)]
+    add_phase_time(phase_times, "ScanCacheHashing", start_time)
+    return True
+
+# Whether to only check which source files need replacements, rather than performing them (see --check)
+CheckOnly = False
+
+# Performs replacements in a single source file, returning a dictionary describing the result
+def replace_in_file(file_path):
+    phase_times = {}
+    result = {"Changed": False, "Prefiltered": False, "MarkerIndexed": False, "ScanCacheEntry": None, "PhaseTimes": phase_times, "BytesRead": 0, "BytesWritten": 0}
+    stat = os.stat(file_path)
+    # The diff written for WriteChangeDiff needs the whole text of the file, so neither the marker index nor byte-level
+    # patching is used with it
+    if not PrebuildConfig.WriteChangeDiff and try_apply_marker_index(file_path, stat, result):
+        return result
+    if PrebuildConfig.BytePatchMinFileSize != None and stat.st_size >= max(1, PrebuildConfig.BytePatchMinFileSize) and not PrebuildConfig.WriteChangeDiff:
+        if try_patch_file_bytes(file_path, stat, result):
+            return result
+    start_time = time.time()
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    result["BytesRead"] = len(data)
+    start_time = add_phase_time(phase_times, "Reading", start_time)
+    if not could_need_replacements(data):
+        result["Prefiltered"] = True
+        if PrebuildConfig.UseScanCache and not CheckOnly:
+            result["ScanCacheEntry"] = get_scan_cache_entry(file_path, stat, data)
+        add_phase_time(phase_times, "Prefiltering", start_time)
+        return result
+    start_time = add_phase_time(phase_times, "Prefiltering", start_time)
+    [use_encoding, text] = try_detect_encoding(file_path, data)
+    lines = split_lines(text)
+    start_time = add_phase_time(phase_times, "EncodingDetection", start_time)
+    new_lines = replace_lines(file_path, lines)
+    start_time = add_phase_time(phase_times, "Replacing", start_time)
+    # Don't overwrite the source file if nothing changed!
+    # This prevents file timestamps from updating unnecessarily, which would trigger a rebuild of those source files
+    if new_lines == None:
+        if PrebuildConfig.UseScanCache and not CheckOnly:
+            result["ScanCacheEntry"] = get_scan_cache_entry(file_path, stat, data, use_encoding)
+        add_phase_time(phase_times, "ScanCacheHashing", start_time)
+        return result
+    result["Changed"] = True
+    result["ChangedLines"] = [index + 1 for index, (line, new_line) in enumerate(zip(lines, new_lines)) if line != new_line]
+    if CheckOnly:
+        return result
+    if PrebuildConfig.WriteChangeDiff:
+        result["Diff"] = get_unified_diff(file_path, lines, new_lines)
+    new_data = encode_lines(new_lines, use_encoding)
+    # Write to a temporary file first and then replace the source file in one step, so that a failure part-way through
+    # never leaves a partially written source file behind
+    temp_path = file_path + "." + str(os.getpid()) + ".new"
+    with open(temp_path, 'wb') as f:
+        f.write(new_data)
+    replace_file(temp_path, file_path)
+    result["BytesWritten"] = len(new_data)
+    start_time = add_phase_time(phase_times, "Writing", start_time)
+    if PrebuildConfig.UseScanCache:
+        result["ScanCacheEntry"] = get_scan_cache_entry(file_path, os.stat(file_path), new_data, use_encoding)
+    add_phase_time(phase_times, "ScanCacheHashing", start_time)
+    return result
+
+# Returns the result of replace_in_file along with the file's log and error (if any), so the caller can report results
+# in order. This is what runs in worker processes when processing files in parallel.
+def process_file(file_path):
+    global FileLog, FileRuleHits
+    FileLog = []
+    if PrebuildProfile:
+        FileRuleHits = {}
+    try:
+        result = replace_in_file(file_path)
+    except PrebuildError as e:
+        result = {"Error": e}
+    result["Log"] = FileLog
+    result["RuleHits"] = FileRuleHits
+    FileLog = None
+    FileRuleHits = None
+    return result
+
+# Worker processes may not inherit the main process state (i.e. when they're spawned rather than forked)
+# get_worker_environment() is the state from the environment that they need, which is passed to their initializer.
+def get_worker_environment():
+    return (PluginDir, (MajorVersion, MinorVersion, PatchVersion), PrebuildProfile)
+
+def init_worker_environment(environment):
+    global PrebuildProfile
+    [plugin_dir, engine_version, PrebuildProfile] = environment
+    set_plugin_dir(plugin_dir)
+    set_engine_version(*engine_version)
+    init_config()
+
+def init_worker(environment, valid_codecs, macro_replacement_table, macro_file_matchers, check_only=False, log_line_changes=False, marker_index=None, scan_cache_timestamp=0.0):
+    global CheckOnly, LogLineChanges, MarkerIndex, ScanCacheTimestamp
+    init_worker_environment(environment)
+    ValidCodecs[:] = valid_codecs
+    set_macro_replacements(macro_replacement_table, macro_file_matchers)
+    CheckOnly = check_only
+    LogLineChanges = log_line_changes
+    MarkerIndex = marker_index or {}
+    ScanCacheTimestamp = scan_cache_timestamp
+    compile_rules()
+
+ConfigDefaults["MinFilesPerJob"] = 32
+
+def get_job_count(num_files):
+    # We rely on concurrent.futures worker initializers, which require Python 3.7
+    # Older versions of Unreal ship with Python 2.7, so those always process files serially
+    if sys.version_info < (3, 7):
+        return 1
+    jobs = 0
+    if PrebuildJobs:
+        try:
+            jobs = int(PrebuildJobs)
+        except ValueError:
+            print("WARNING: Ignoring invalid PrebuildJobs value '" + PrebuildJobs + "'")
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    # Worker processes take a while to start up, so don't use more of them than there's work for
+    return max(1, min(jobs, num_files // max(1, PrebuildConfig.MinFilesPerJob)))
+
+# Totals for the summary printed at the end of a prebuild
+Totals = {"SourceFiles": 0, "ScanCacheSkipped": 0, "MarkerIndexed": 0, "Prefiltered": 0, "Changed": 0, "ChangedLines": 0, "Jobs": 1, "BytesRead": 0, "BytesWritten": 0}
+# In check mode, stop after finding this many source files that need replacements (0 = check every file)
+MaxViolations = 0
+
+# Time spent in each phase of the prebuild in seconds, which is written to ProfilePath when PrebuildProfile is set.
+# PhaseTimes is wall time in the main process. FilePhaseTimes is the time spent on each source file summed across all
+# files, so it adds up to more than the wall time of the Processing phase when files are processed in parallel.
+PhaseTimes = {}
+FilePhaseTimes = {}
+StartTime = None
+# Per-file timings and sizes, and the total [hits, changes] for each replacement rule, for the profile
+FileProfiles = []
+RuleHits = {}
+ConfigDefaults["ProfileSlowestFileCount"] = 20
+
+# Adds the time since start_time to a phase and returns the current time, so consecutive phases can be chained
+def add_phase_time(phase_times, phase, start_time):
+    now = time.time()
+    phase_times[phase] = phase_times.get(phase, 0.0) + now - start_time
+    return now
+
+def add_file_profile(file_path, result):
+    FileProfiles.append({
+        "Path": os.path.relpath(file_path, PluginDir).replace("\\", "/"),
+        "Time": sum(result["PhaseTimes"].values()),
+        "Phases": result["PhaseTimes"],
+        "BytesRead": result["BytesRead"],
+        "BytesWritten": result["BytesWritten"],
+        "Prefiltered": result["Prefiltered"],
+        "MarkerIndexed": result["MarkerIndexed"],
+        "Changed": result["Changed"]
+    })
+    for rule, [hits, changes] in result["RuleHits"].items():
+        counts = RuleHits.setdefault(rule, [0, 0])
+        counts[0] += hits
+        counts[1] += changes
+
+def write_profile():
+    import json
+    phase_times = dict(PhaseTimes)
+    add_phase_time(phase_times, "Total", StartTime)
+    # User macros and rules are grouped separately from the built-in rules
+    rules = {}
+    macros = {}
+    custom_rules = {}
+    for rule, [hits, changes] in RuleHits.items():
+        if rule.startswith("Macro:"):
+            macros[rule[len("Macro:"):]] = {"Hits": hits, "Changes": changes}
+        elif rule.startswith("Custom:"):
+            custom_rules[rule[len("Custom:"):]] = {"Hits": hits, "Changes": changes}
+        else:
+            rules[rule] = {"Hits": hits, "Changes": changes}
+    slowest_files = sorted(FileProfiles, key=lambda file_profile: file_profile["Time"], reverse=True)
+    profile = {
+        "EngineVersion": EngineVersion,
+        "PythonVersion": sys.version.split()[0],
+        "Totals": Totals,
+        "Phases": phase_times,
+        "FilePhases": FilePhaseTimes,
+        "Rules": rules,
+        "Macros": macros,
+        "CustomRules": custom_rules,
+        "SlowestFiles": slowest_files[:PrebuildConfig.ProfileSlowestFileCount],
+        "Files": FileProfiles
+    }
+    try:
+        if not os.path.isdir(PrebuildIntermediateDir):
+            os.makedirs(PrebuildIntermediateDir)
+        with open(ProfilePath, 'w') as f:
+            json.dump(profile, f, indent=4, sort_keys=True)
+    except (IOError, OSError) as e:
+        print("WARNING: Failed to save prebuild profile to " + ProfilePath + ": " + str(e))
+
+def report_file_result(file_path, result):
+    for message in result["Log"]:
+        print(message)
+    if result.get("Error") != None:
+        exit_with_error(result["Error"])
+    if result["ScanCacheEntry"] != None:
+        VisitedScanCache[file_path] = result["ScanCacheEntry"]
+    if result["Prefiltered"]:
+        Totals["Prefiltered"] += 1
+    if result["MarkerIndexed"]:
+        Totals["MarkerIndexed"] += 1
+    if result["Changed"]:
+        Totals["Changed"] += 1
+        Totals["ChangedLines"] += len(result["ChangedLines"])
+        if CheckOnly:
+            print("Prebuild: " + file_path + " is not up to date for UE " + EngineVersion + " (lines " + ", ".join(str(line_num) for line_num in result["ChangedLines"]) + ")")
+        elif LogLevel != "quiet":
+            print("Prebuild: Changed " + str(len(result["ChangedLines"])) + " lines in " + file_path)
+        if result.get("Diff") != None:
+            ChangeDiffs.append(result["Diff"])
+    Totals["BytesRead"] += result["BytesRead"]
+    Totals["BytesWritten"] += result["BytesWritten"]
+    for phase, seconds in result["PhaseTimes"].items():
+        FilePhaseTimes[phase] = FilePhaseTimes.get(phase, 0.0) + seconds
+    if PrebuildProfile:
+        add_file_profile(file_path, result)
+
+def report_file_results(file_paths, results):
+    for file_path, result in zip(file_paths, results):
+        report_file_result(file_path, result)
+        if CheckOnly and MaxViolations > 0 and Totals["Changed"] >= MaxViolations:
+            print("Prebuild: Stopping after " + str(Totals["Changed"]) + " source files that are not up to date")
+            return
+
+# Project mode passes the name of the plugin, since it prints a summary for each of them
+def print_summary(plugin_name=None):
+    if LogLevel == "quiet":
+        return
+    changed_lines = ""
+    if not CheckOnly and Totals["Changed"] > 0:
+        changed_lines = " - " + str(Totals["ChangedLines"]) + " lines changed"
+    marker_indexed = ""
+    if Totals["MarkerIndexed"] > 0:
+        marker_indexed = str(Totals["MarkerIndexed"]) + " checked with the marker index, "
+    print("Prebuild: " + (plugin_name and plugin_name + ": " or "") + "Checked " + str(Totals["SourceFiles"]) + " source files (" + str(Totals["ScanCacheSkipped"]) + " skipped by scan cache, " + marker_indexed + str(Totals["Prefiltered"]) + " rejected by prefilter, " + str(Totals["Changed"]) + (CheckOnly and " not up to date)" or " changed)") + changed_lines)
+
+# Unified diffs of the source files changed by the prebuild, which are written to ChangeDiffPath if WriteChangeDiff is set
+ChangeDiffs = []
+ConfigDefaults["WriteChangeDiff"] = False
+
+def write_change_diff():
+    try:
+        if not os.path.isdir(PrebuildIntermediateDir):
+            os.makedirs(PrebuildIntermediateDir)
+        with open(ChangeDiffPath, 'wb') as f:
+            f.write(u"".join(ChangeDiffs).encode('utf-8'))
+    except (IOError, OSError) as e:
+        print("WARNING: Failed to save prebuild change diff to " + ChangeDiffPath + ": " + str(e))
+
+# Runs process_function on each file, in worker processes if there are enough files, and passes the results to
+# report_function in path order. Worker processes are set up by calling initializer with initargs.
+def process_files(file_paths, process_function=process_file, report_function=report_file_results, initializer=init_worker, initargs=None):
+    jobs = get_job_count(len(file_paths))
+    Totals["Jobs"] = jobs
+    if jobs <= 1:
+        report_function(file_paths, (process_function(file_path) for file_path in file_paths))
+        return
+    import concurrent.futures
+    if initargs == None:
+        initargs = (get_worker_environment(), ValidCodecs, MacroReplacementTable, MacroFileMatchers, CheckOnly, LogLineChanges, MarkerIndex, ScanCacheTimestamp)
+    executor = concurrent.futures.ProcessPoolExecutor(jobs, initializer=initializer, initargs=initargs)
+    try:
+        # Results are yielded in path order regardless of which worker finishes first
+        chunk_size = max(1, len(file_paths) // (jobs * 4))
+        report_function(file_paths, executor.map(process_function, file_paths, chunksize=chunk_size))
+    finally:
+        # Don't bother processing the remaining files if we're exiting due to an error
+        if sys.version_info >= (3, 9):
+            executor.shutdown(wait=True, cancel_futures=True)
+        else:
+            executor.shutdown(wait=True)
+
+# Engine versions to evaluate in matrix mode, each with the rule state that depends on it
+# Each entry is {"Version": [major, minor, patch], "MacroReplacementTable": ..., "MacroFileMatchers": ...}
+MatrixVersions = []
+# Unified diffs for each version in MatrixVersions, and the number of files/lines they change
+MatrixPatches = []
+MatrixTotals = []
+
+def parse_matrix_versions(versions_string):
+    versions = []
+    for version in versions_string.split(","):
+        parts = version.strip().split(".")
+        if len(parts) < 2 or len(parts) > 3 or not all(part.isdigit() for part in parts):
+            print_error_and_exit("Invalid engine version '" + version + "' in --matrix (expected Major.Minor[.Patch])")
+        versions.append((parts + ["0"])[:3])
+    return versions
+
+# Evaluates the prebuild headers and MacroReplacements for each engine version.
+# The headers were already read and decoded by the caller, so only their macro definitions are evaluated here.
+def init_matrix_versions(versions, header_lines):
+    for version in versions:
+        set_engine_version(*version)
+        HeaderMacros.clear()
+        for path, lines in header_lines:
+            parse_prebuild_header_lines(path, lines)
+        compile_macro_replacements()
+        MatrixVersions.append({"Version": version, "MacroReplacementTable": MacroReplacementTable, "MacroFileMatchers": MacroFileMatchers})
+        MatrixPatches.append([])
+        MatrixTotals.append({"Files": 0, "Lines": 0})
+
+def use_matrix_version(matrix_version):
+    set_engine_version(*matrix_version["Version"])
+    set_macro_replacements(matrix_version["MacroReplacementTable"], matrix_version["MacroFileMatchers"])
+    compile_version_rules()
+
+def init_matrix_worker(environment, valid_codecs, matrix_versions):
+    global LogLineChanges
+    init_worker_environment(environment)
+    ValidCodecs[:] = valid_codecs
+    MatrixVersions[:] = matrix_versions
+    LogLineChanges = False
+    compile_rules()
+
+# Formats the difference between the lines of a file as a unified diff (which git apply understands)
+def get_unified_diff(file_path, lines, new_lines):
+    import difflib
+    path = os.path.relpath(file_path, PluginDir).replace("\\", "/")
+    diff = []
+    for line in difflib.unified_diff(lines, new_lines, "a/" + path, "b/" + path):
+        diff.append(line)
+        if not line.endswith(u"\n"):
+            diff.append(u"\n\\ No newline at end of file\n")
+    return u"".join(diff)
+
+# Works out what the prebuild would do to a file for each of the MatrixVersions, without modifying it.
+# The file is only read and decoded once, no matter how many versions there are.
+def evaluate_file_matrix(file_path):
+    global FileLog
+    FileLog = []
+    result = {"Diffs": [], "ChangedLines": []}
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        lines = None
+        for matrix_version in MatrixVersions:
+            use_matrix_version(matrix_version)
+            new_lines = None
+            if could_need_replacements(data):
+                if lines == None:
+                    [use_encoding, text] = try_detect_encoding(file_path, data)
+                    lines = split_lines(text)
+                new_lines = replace_lines(file_path, lines)
+            if new_lines == None:
+                result["Diffs"].append(None)
+                result["ChangedLines"].append(0)
+            else:
+                result["Diffs"].append(get_unified_diff(file_path, lines, new_lines))
+                result["ChangedLines"].append(sum(1 for line, new_line in zip(lines, new_lines) if line != new_line))
+    except PrebuildError as e:
+        result = {"Error": e}
+    # Every version logs the same warnings, so only keep the first of each
+    result["Log"] = []
+    for message in FileLog:
+        if message not in result["Log"]:
+            result["Log"].append(message)
+    FileLog = None
+    return result
+
+def report_matrix_results(file_paths, results):
+    for file_path, result in zip(file_paths, results):
+        for message in result["Log"]:
+            print(message)
+        if result.get("Error") != None:
+            exit_with_error(result["Error"])
+        for index, diff in enumerate(result["Diffs"]):
+            if diff != None:
+                MatrixPatches[index].append(diff)
+                MatrixTotals[index]["Files"] += 1
+                MatrixTotals[index]["Lines"] += result["ChangedLines"][index]
+
+# Writes a patch for each engine version (unless summary_only is set) and a summary of all of them to output_dir
+def write_matrix_results(output_dir, summary_only):
+    import json
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    summary = {}
+    for matrix_version, patches, totals in zip(MatrixVersions, MatrixPatches, MatrixTotals):
+        version = ".".join(matrix_version["Version"])
+        summary[version] = {"ChangedFiles": totals["Files"], "ChangedLines": totals["Lines"]}
+        message = "Prebuild: UE " + version + " would change " + str(totals["Lines"]) + " lines in " + str(totals["Files"]) + " source files"
+        if not summary_only:
+            patch_path = os.path.join(output_dir, version + ".patch")
+            with open(patch_path, 'wb') as f:
+                f.write(u"".join(patches).encode('utf-8'))
+            summary[version]["Patch"] = patch_path
+            message += " (" + patch_path + ")"
+        print(message)
+    with open(os.path.join(output_dir, "Summary.json"), 'w') as f:
+        json.dump(summary, f, indent=4, sort_keys=True)
+
+# Yields (name, is_dir, is_file) for each entry in a directory, sorted by name
+# os.scandir gets the entry types from the directory listing itself on most platforms, so we don't have to stat every
+# entry. It doesn't exist before Python 3.5, in which case we fall back to os.listdir.
+def list_directory(directory):
+    if hasattr(os, "scandir"):
+        entries = list(os.scandir(directory))
+        entries.sort(key=lambda entry: entry.name)
+        for entry in entries:
+            is_dir = entry.is_dir()
+            yield entry.name, is_dir, not is_dir and entry.is_file()
+    else:
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            is_dir = os.path.isdir(path)
+            yield name, is_dir, not is_dir and os.path.isfile(path)
+
+ConfigDefaults["ExcludeDirs"] = [r'.*/ThirdParty$', r'.*/Intermediate$', r'.*/Binaries$']
+
+# Collects all files under a directory in path order
+def collect_files_recursive(directory, file_paths):
+    for name, is_dir, is_file in list_directory(directory):
+        # Always use / path separators to simplify file matching regex
+        path = os.path.join(directory, name).replace("\\", "/")
+        if is_dir:
+            # Prune excluded directories before descending into them
+            if not matches_any_pattern(path, PrebuildConfig.ExcludeDirs):
+                collect_files_recursive(path, file_paths)
+        elif is_file and is_file_eligible_for_replacements(path):
+            file_paths.append(path)
+
+# Reads a newline separated list of paths from a file, or from stdin if the path is -
+def read_file_list(list_path):
+    try:
+        if list_path == "-":
+            text = sys.stdin.read()
+        else:
+            with open(list_path, 'r') as f:
+                text = f.read()
+    except (IOError, OSError) as e:
+        print_error_and_exit("Failed to read file list " + list_path, None, None, e)
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+# Collects the listed files that collect_files_recursive would find in one of the directories, in path order.
+# Paths are built the same way collect_files_recursive builds them, so they match the scan cache.
+def collect_listed_files(listed_paths, directories, file_paths):
+    found_paths = set()
+    for listed_path in listed_paths:
+        full_path = os.path.abspath(os.path.join(PluginDir, listed_path))
+        for directory in directories:
+            try:
+                relative_path = os.path.relpath(full_path, os.path.abspath(directory))
+            except ValueError:
+                # Paths on different drives
+                continue
+            parts = relative_path.replace("\\", "/").split("/")
+            if relative_path == os.curdir or parts[0] == os.pardir:
+                continue
+            path = directory
+            is_excluded = False
+            for part in parts[:-1]:
+                path = os.path.join(path, part).replace("\\", "/")
+                if matches_any_pattern(path, PrebuildConfig.ExcludeDirs):
+                    is_excluded = True
+                    break
+            path = os.path.join(path, parts[-1]).replace("\\", "/")
+            if not is_excluded and os.path.isfile(path) and is_file_eligible_for_replacements(path):
+                found_paths.add(path)
+    file_paths.extend(sorted(found_paths))
+
+# Exit code for --check when source files aren't up to date. Errors exit with code 1.
+CheckFailedExitCode = 2
+
+def parse_args():
+    import argparse
+    parser = argparse.ArgumentParser(description="Performs version-specific text replacements in the plugin source files")
+    parser.add_argument("--check", action="store_true", help="only check whether the source files are up to date for the engine version, without modifying them. Exits with code " + str(CheckFailedExitCode) + " if any aren't.")
+    parser.add_argument("--max-violations", metavar="N", type=int, default=0, help="with --check, stop after finding N source files that aren't up to date")
+    parser.add_argument("--matrix", metavar="VERSIONS", help="comma separated list of engine versions (i.e. 4.27,5.0,5.5) to work out the replacements for, without modifying any source files")
+    parser.add_argument("--matrix-output", metavar="DIR", default=os.path.join(PrebuildIntermediateDir, "Matrix"), help="directory to write the patch for each --matrix version and a summary of them to")
+    parser.add_argument("--summary-only", action="store_true", help="only write a summary of the changes for each --matrix version, rather than a patch")
+    parser.add_argument("--daemon", action="store_true", help="keep running, and apply replacements to source files as soon as they change. Builds hand their work to the daemon while it's running.")
+    parser.add_argument("--stop-daemon", action="store_true", help="stop the daemon started with --daemon, if it's running")
+    parser.add_argument("--files", metavar="LIST", help="only process the source files listed (one per line) in the file LIST, or stdin if LIST is -, instead of searching ProcessDirs for them. Listed files are still filtered by ProcessDirs, ExcludeDirs and MatchAllSourceFiles. Relative paths are relative to PluginDir.")
+    parser.add_argument("--project", metavar="DIR", help="process every plugin under DIR (a project or Plugins directory) that has a PrebuildConfig.py, in a single pass. The plugins' own prebuilds are skipped for the rest of the build.")
+    args = parser.parse_args()
+    if len([arg for arg in (args.check, args.matrix, args.daemon, args.stop_daemon, args.project) if arg]) > 1:
+        parser.error("only one of --check, --matrix, --daemon, --stop-daemon and --project can be used at a time")
+    if args.files and (args.matrix or args.daemon or args.stop_daemon or args.project):
+        parser.error("--files can't be used with --matrix, --daemon, --stop-daemon or --project")
+    return args
+
+# Evaluates the replacements for several engine versions in a single pass over the source files
+def run_matrix(versions_string, output_dir, summary_only, header_paths):
+    global LogLineChanges
+    LogLineChanges = False
+    versions = parse_matrix_versions(versions_string)
+    header_lines = [(path, read_prebuild_header(path)) for path in header_paths]
+    init_matrix_versions(versions, header_lines)
+    source_files = []
+    for dir in PrebuildConfig.ProcessDirs:
+        dir = dir.replace("{PluginName}", PluginName)
+        collect_files_recursive(os.path.join(PluginDir, dir), source_files)
+    process_files(source_files, evaluate_file_matrix, report_matrix_results, init_matrix_worker, (get_worker_environment(), ValidCodecs, MatrixVersions))
+    write_matrix_results(output_dir, summary_only)
+
+# Builds of several targets at once (i.e. Editor and Game) each run the prebuild for the same plugin. They'd modify the
+# same source files, so they take turns using a lock file, and one that had to wait reuses the result of the one it
+# waited for if it had the same engine version, scripts, config and headers.
+# Bump this whenever the format of the shared result changes
+SharedResultVersion = 1
+# How often (in seconds) to check whether the lock is free, and how long to wait for it before going ahead anyway
+LockPollInterval = 0.1
+LockTimeout = 600.0
+# Lock files held by this process, which are released when it exits (project mode holds one for each plugin). The
+# daemon releases its lock after each pass instead.
+LockFiles = []
+
+def try_lock_file(f):
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except (IOError, OSError):
+        return False
+
+def open_lock_file():
+    try:
+        if not os.path.isdir(PrebuildIntermediateDir):
+            os.makedirs(PrebuildIntermediateDir)
+        return open(LockPath, 'a+')
+    except (IOError, OSError) as e:
+        print("WARNING: Failed to open prebuild lock file " + LockPath + ": " + str(e))
+        return None
+
+# Takes the plugin's lock, waiting for any other prebuild of the plugin to finish first. Returns whether it had to wait.
+# The operating system releases the lock if the process dies, so a crashed prebuild never leaves it held.
+def acquire_prebuild_lock():
+    f = open_lock_file()
+    if f == None:
+        return False
+    wait_start_time = time.time()
+    waited = False
+    while not try_lock_file(f):
+        if not waited and LogLevel != "quiet":
+            print("Prebuild: Waiting for another prebuild of " + PluginName + " to finish")
+        waited = True
+        if time.time() - wait_start_time > LockTimeout:
+            print("WARNING: Gave up waiting for the prebuild lock " + LockPath + " after " + str(int(LockTimeout)) + " seconds")
+            f.close()
+            return waited
+        time.sleep(LockPollInterval)
+    LockFiles.append(f)
+    return waited
+
+# Takes the plugin's lock if no other prebuild of the plugin is running. Returns whether it did.
+def try_acquire_prebuild_lock():
+    f = open_lock_file()
+    if f == None:
+        return False
+    if not try_lock_file(f):
+        f.close()
+        return False
+    LockFiles.append(f)
+    return True
+
+# Releases the lock taken most recently by acquire_prebuild_lock or try_acquire_prebuild_lock
+def release_prebuild_lock():
+    f = LockFiles.pop()
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    except (IOError, OSError):
+        pass
+    f.close()
+
+def write_shared_result(fingerprint, output):
+    import json
+    result = {"Version": SharedResultVersion, "Fingerprint": fingerprint, "StartTime": StartTime, "EndTime": time.time(), "Output": output}
+    try:
+        temp_path = SharedResultPath + "." + str(os.getpid()) + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(result, f)
+        replace_file(temp_path, SharedResultPath)
+    except (IOError, OSError) as e:
+        print("WARNING: Failed to save prebuild result to " + SharedResultPath + ": " + str(e))
+
+# Returns the output of a prebuild with the same fingerprint that finished while this one was waiting for the lock, or
+# None if there wasn't one. A prebuild that finished before this one started may have missed changes since then.
+def read_shared_result(fingerprint):
+    import json
+    try:
+        with open(SharedResultPath, 'r') as f:
+            result = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+    if not isinstance(result, dict) or result.get("Version") != SharedResultVersion or result.get("Fingerprint") != fingerprint:
+        return None
+    if (result.get("EndTime") or 0.0) < StartTime:
+        return None
+    return result.get("Output") or u""
+
+# Exits if a project-wide prebuild already processed this plugin earlier in the build
+def exit_if_processed_by_project(header_paths):
+    if is_project_pass_current(header_paths):
+        if LogLevel != "quiet":
+            print("Prebuild: " + PluginName + " was already processed by the project prebuild")
+        sys.exit(0)
+
+# Project mode (see --project) processes every plugin in a project with a single pool of worker processes.
+# Each plugin keeps its own PrebuildConfig, macro table, scan cache and totals, which are swapped in and out of the
+# globals below as the files of each plugin are processed and reported.
+# Each entry is {"PluginDir": ..., "ScriptsDir": ..., "State": {<global name>: <value>}}
+ProjectPlugins = []
+# Index of the plugin in ProjectPlugins whose state is currently in the globals
+CurrentProjectPlugin = None
+# Globals that hold the state of a single plugin. Worker processes only need the first five (and load the config).
+ProjectWorkerStateGlobals = ("ValidCodecs", "MacroReplacementTable", "MacroFileMatchers", "MarkerIndex", "ScanCacheTimestamp")
+ProjectStateGlobals = ProjectWorkerStateGlobals + ("PrebuildConfig", "HeaderMacros", "Totals", "ScanCache", "VisitedScanCache", "ChangeDiffs", "PhaseTimes", "FilePhaseTimes", "FileProfiles", "RuleHits")
+# Version of the stamp a project-wide prebuild leaves in each plugin's ProjectPassPath
+ProjectPassVersion = 1
+ConfigDefaults["ProjectPassMaxAge"] = 120
+
+# Finds the plugins under a project (or Plugins) directory that have prebuild scripts, in path order
+def find_project_plugins(root):
+    if os.path.isfile(root):
+        root = os.path.dirname(root)
+    if os.path.isdir(os.path.join(root, "Plugins")):
+        root = os.path.join(root, "Plugins")
+    plugin_dirs = []
+    for directory, dir_names, file_names in os.walk(root):
+        dir_names.sort()
+        if any(name.endswith(".uplugin") for name in file_names):
+            # Plugins can't contain other plugins
+            dir_names[:] = []
+            if os.path.isfile(os.path.join(directory, "Resources", "BuildScripts", "PrebuildConfig.py")):
+                plugin_dirs.append(os.path.abspath(directory))
+        else:
+            dir_names[:] = [name for name in dir_names if not name.startswith(".") and name not in ("Intermediate", "Binaries", "Saved")]
+    return plugin_dirs
+
+def exec_module_file(path, module):
+    with open(path, 'rb') as f:
+        source = f.read()
+    exec(compile(source, path, 'exec'), module.__dict__)
+
+# Loads a plugin's PrebuildConfig.py as a separate module, along with its own copy of PrebuildConst.py, so that the
+# changes each config makes to the constants (i.e. MacroSuffixNames) don't leak into the other plugins
+def load_plugin_config(scripts_dir):
+    module_type = type(sys)
+    const_path = os.path.join(scripts_dir, "PrebuildConst.py")
+    if not os.path.isfile(const_path):
+        const_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "PrebuildConst.py")
+    config_path = os.path.join(scripts_dir, "PrebuildConfig.py")
+    const_module = module_type("PrebuildConst")
+    const_module.__file__ = const_path
+    config_module = module_type("PrebuildConfig")
+    config_module.__file__ = config_path
+    previous_const_module = sys.modules.get("PrebuildConst")
+    try:
+        exec_module_file(const_path, const_module)
+        sys.modules["PrebuildConst"] = const_module
+        exec_module_file(config_path, config_module)
+    except Exception as e:
+        print_error_and_exit("Failed to load " + config_path, None, None, e)
+    finally:
+        sys.modules["PrebuildConst"] = previous_const_module
+    # Plugins with an older copy of the scripts may not have every option
+    apply_config_defaults(config_module)
+    return config_module
+
+def new_project_plugin(plugin_dir):
+    state = {
+        "PrebuildConfig": None,
+        "ValidCodecs": [],
+        "MacroReplacementTable": {},
+        "MacroFileMatchers": (),
+        "HeaderMacros": {},
+        "Totals": dict((key, 0) for key in Totals),
+        "ScanCache": {},
+        "ScanCacheTimestamp": 0.0,
+        "VisitedScanCache": {},
+        "MarkerIndex": {},
+        "ChangeDiffs": [],
+        "PhaseTimes": {},
+        "FilePhaseTimes": {},
+        "FileProfiles": [],
+        "RuleHits": {}
+    }
+    return {"PluginDir": plugin_dir, "ScriptsDir": os.path.join(plugin_dir, "Resources", "BuildScripts"), "State": state}
+
+# Saves the state of the current plugin, and puts the state of the plugin at plugin_index into the globals
+def use_project_plugin(plugin_index):
+    global CurrentProjectPlugin
+    if plugin_index == CurrentProjectPlugin:
+        return
+    save_project_plugin()
+    plugin = ProjectPlugins[plugin_index]
+    if plugin["State"].get("PrebuildConfig") == None:
+        plugin["State"]["PrebuildConfig"] = load_plugin_config(plugin["ScriptsDir"])
+    globals().update(plugin["State"])
+    set_plugin_dir(plugin["PluginDir"])
+    set_macro_replacements(MacroReplacementTable, MacroFileMatchers)
+    init_config()
+    # Plugins with the same macro names compile to the same patterns, which the re module caches
+    compile_rules()
+    CurrentProjectPlugin = plugin_index
+
+def save_project_plugin():
+    if CurrentProjectPlugin != None:
+        state = ProjectPlugins[CurrentProjectPlugin]["State"]
+        for name in state:
+            state[name] = globals()[name]
+
+# Workers load each plugin's config themselves, since modules can't be passed to them
+def get_project_worker_plugins():
+    return [{"PluginDir": plugin["PluginDir"], "ScriptsDir": plugin["ScriptsDir"], "State": dict((name, plugin["State"][name]) for name in ProjectWorkerStateGlobals)} for plugin in ProjectPlugins]
+
+def init_project_worker(environment, plugins, log_line_changes):
+    global LogLineChanges
+    init_worker_environment(environment)
+    ProjectPlugins[:] = plugins
+    LogLineChanges = log_line_changes
+
+# Files are passed around as (plugin index, file path)
+def process_project_file(project_file):
+    use_project_plugin(project_file[0])
+    return process_file(project_file[1])
+
+def report_project_results(project_files, results):
+    for [plugin_index, file_path], result in zip(project_files, results):
+        use_project_plugin(plugin_index)
+        report_file_result(file_path, result)
+
+def write_project_pass(fingerprint):
+    import json
+    try:
+        if not os.path.isdir(PrebuildIntermediateDir):
+            os.makedirs(PrebuildIntermediateDir)
+        with open(ProjectPassPath, 'w') as f:
+            json.dump({"Version": ProjectPassVersion, "Fingerprint": fingerprint, "Time": time.time()}, f)
+    except (IOError, OSError) as e:
+        print("WARNING: Failed to save project prebuild stamp to " + ProjectPassPath + ": " + str(e))
+
+# Whether a project-wide prebuild already processed this plugin with the same scripts, config, headers and engine version
+# a short time ago (i.e. earlier in the same build)
+def is_project_pass_current(header_paths):
+    if not os.path.isfile(ProjectPassPath):
+        return False
+    import json
+    try:
+        with open(ProjectPassPath, 'r') as f:
+            stamp = json.load(f)
+    except (IOError, OSError, ValueError):
+        return False
+    if not isinstance(stamp, dict) or stamp.get("Version") != ProjectPassVersion:
+        return False
+    age = time.time() - (stamp.get("Time") or 0.0)
+    if age < 0.0 or age >= PrebuildConfig.ProjectPassMaxAge:
+        return False
+    return stamp.get("Fingerprint") == get_scan_fingerprint(header_paths)
+
+# Processes every plugin in a project in a single pass
+def run_project(project_dir):
+    global CurrentProjectPlugin
+    plugin_dirs = find_project_plugins(project_dir)
+    if not plugin_dirs:
+        print("Prebuild: No plugins with prebuild scripts found in " + project_dir)
+        return
+    # Header paths are relative to each plugin's directory
+    working_dir = os.getcwd()
+    project_state = dict((name, globals()[name]) for name in ProjectStateGlobals)
+    project_files = []
+    fingerprints = []
+    for plugin_dir in plugin_dirs:
+        phase_start_time = time.time()
+        ProjectPlugins.append(new_project_plugin(plugin_dir))
+        plugin_index = len(ProjectPlugins) - 1
+        use_project_plugin(plugin_index)
+        # Plugins are locked in path order, so concurrent project prebuilds can't deadlock
+        acquire_prebuild_lock()
+        os.chdir(PluginDir)
+        check_encodings()
+        header_paths = [path.replace("{PluginName}", PluginName) for path in PrebuildConfig.CustomPrebuildHeaders]
+        parse_prebuild_headers(header_paths)
+        compile_macro_replacements()
+        index_fingerprint = get_index_fingerprint(header_paths)
+        fingerprint = get_scan_fingerprint(header_paths, index_fingerprint)
+        fingerprints.append((fingerprint, index_fingerprint))
+        if PrebuildConfig.UseScanCache:
+            load_scan_cache(fingerprint, index_fingerprint)
+        source_files = []
+        for dir in PrebuildConfig.ProcessDirs:
+            dir = dir.replace("{PluginName}", PluginName)
+            collect_files_recursive(os.path.join(PluginDir, dir), source_files)
+        Totals["SourceFiles"] = len(source_files)
+        if PrebuildConfig.UseScanCache:
+            source_files = [path for path in source_files if not try_skip_cached_file(path)]
+            Totals["ScanCacheSkipped"] = Totals["SourceFiles"] - len(source_files)
+        project_files.extend((plugin_index, path) for path in source_files)
+        add_phase_time(PhaseTimes, "Startup", phase_start_time)
+    os.chdir(working_dir)
+
+    # Every plugin's files go through the same worker pool, which uses the project's PrebuildConfig for its settings
+    save_project_plugin()
+    CurrentProjectPlugin = None
+    globals().update(project_state)
+    phase_start_time = time.time()
+    process_files(project_files, process_project_file, report_project_results, init_project_worker, (get_worker_environment(), get_project_worker_plugins(), LogLineChanges))
+    processing_time = time.time() - phase_start_time
+
+    for plugin_index in range(len(ProjectPlugins)):
+        use_project_plugin(plugin_index)
+        Totals["Jobs"] = project_state["Totals"]["Jobs"]
+        # Every plugin's files are processed together, so the Processing phase of each plugin is the wall time for all of
+        # them. Their FilePhases are only for their own files.
+        PhaseTimes["Processing"] = processing_time
+        [fingerprint, index_fingerprint] = fingerprints[plugin_index]
+        if PrebuildConfig.UseScanCache:
+            save_scan_cache(fingerprint, index_fingerprint)
+        if PrebuildConfig.WriteChangeDiff:
+            write_change_diff()
+        write_project_pass(fingerprint)
+        print_summary(PluginName)
+        if PrebuildProfile:
+            write_profile()
+
+# Daemon mode (see --daemon) keeps the compiled rules, macro table and scan cache in memory, and polls the source files
+# for changes. Builds connect to it over a localhost socket, using the port and token it writes to DaemonPath.
+# Bump this whenever the daemon's request/response format changes
+DaemonProtocolVersion = 1
+# How long (in seconds) builds wait to connect to the daemon, and for it to respond, before doing the work themselves
+DaemonConnectTimeout = 0.5
+DaemonRequestTimeout = 300.0
+ConfigDefaults["UseDaemon"] = True
+ConfigDefaults["DaemonPollInterval"] = 0.5
+
+# Output of the daemon's background passes, which is passed on to the next build
+DaemonPendingOutput = []
+# Size and mtime of each source file as of the daemon's last pass
+DaemonSnapshot = {}
+
+# Collects everything printed while it's installed as sys.stdout, optionally echoing it to another stream as well
+class OutputCapture(object):
+    def __init__(self, echo=None):
+        self.parts = []
+        self.echo = echo
+
+    def write(self, text):
+        if self.echo != None:
+            self.echo.write(text)
+        if not isinstance(text, type(u"")):
+            text = text.decode('utf-8', 'replace')
+        self.parts.append(text)
+
+    def flush(self):
+        if self.echo != None:
+            self.echo.flush()
+
+    def get_text(self):
+        return u"".join(self.parts)
+
+# Sizes and mtimes of the files that the daemon's compiled state depends on. The daemon stops if any of them change.
+def get_daemon_inputs(header_paths):
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    script_files = [os.path.join(script_dir, name) for name in ("PrebuildCore.py", "PrebuildConfig.py", "PrebuildConst.py")]
+    inputs = []
+    for path in script_files + header_paths:
+        try:
+            stat = os.stat(path)
+            inputs.append((path, stat.st_size, stat.st_mtime))
+        except OSError:
+            inputs.append((path, None, None))
+    return inputs
+
+# Brings every source file up to date, returning the process exit code (i.e. 1 if there was an error)
+# Background passes only process files when the size or mtime of a source file changed since the last pass.
+def run_daemon_pass(fingerprint, index_fingerprint, background):
+    for key in Totals:
+        Totals[key] = 0
+    pass_start_time = time.time()
+    source_files = []
+    for dir in PrebuildConfig.ProcessDirs:
+        dir = dir.replace("{PluginName}", PluginName)
+        collect_files_recursive(os.path.join(PluginDir, dir), source_files)
+    snapshot = {}
+    for path in source_files:
+        try:
+            stat = os.stat(path)
+            snapshot[path] = (stat.st_size, stat.st_mtime)
+        except OSError:
+            pass
+    if background and snapshot == DaemonSnapshot:
+        return 0
+    # Passes hold the plugin's lock like any other prebuild. Background passes don't wait for it, since the files are
+    # checked again on the next poll anyway.
+    lock_count = len(LockFiles)
+    if background:
+        if not try_acquire_prebuild_lock():
+            return 0
+    else:
+        acquire_prebuild_lock()
+    try:
+        return process_daemon_pass(fingerprint, index_fingerprint, source_files, snapshot, pass_start_time)
+    finally:
+        if len(LockFiles) > lock_count:
+            release_prebuild_lock()
+
+def process_daemon_pass(fingerprint, index_fingerprint, source_files, snapshot, pass_start_time):
+    global ScanCache, VisitedScanCache, ScanCacheTimestamp, MarkerIndex, DaemonSnapshot
+    Totals["SourceFiles"] = len(source_files)
+    VisitedScanCache = {}
+    del ChangeDiffs[:]
+    source_files = [path for path in source_files if path in snapshot and not try_skip_cached_file(path)]
+    Totals["ScanCacheSkipped"] = Totals["SourceFiles"] - len(source_files)
+    exit_code = 0
+    try:
+        process_files(source_files)
+    except SystemExit as e:
+        exit_code = e.code or 0
+    # Files we've modified have new mtimes, which shouldn't count as changes on the next pass
+    for path in source_files:
+        try:
+            stat = os.stat(path)
+            snapshot[path] = (stat.st_size, stat.st_mtime)
+        except OSError:
+            pass
+    DaemonSnapshot = snapshot
+    # Files we couldn't process are left out of the cache, so they're tried again on the next pass
+    # Once a pass has brought every file up to date, the marker indexes from the cache of another engine version are
+    # no longer needed.
+    ScanCache = VisitedScanCache
+    ScanCacheTimestamp = pass_start_time
+    MarkerIndex = {}
+    if PrebuildConfig.UseScanCache and len(source_files) > 0:
+        save_scan_cache(fingerprint, index_fingerprint)
+    if PrebuildConfig.WriteChangeDiff and Totals["Changed"] > 0:
+        write_change_diff()
+    return exit_code
+
+def send_daemon_response(connection, response):
+    import json
+    connection.sendall(json.dumps(response).encode('utf-8'))
+
+# Handles a single request to the daemon. Returns True if the daemon should stop.
+def handle_daemon_request(connection, token, fingerprint, index_fingerprint):
+    import json
+    global DaemonPendingOutput
+    connection.settimeout(DaemonRequestTimeout)
+    data = b''
+    while not data.endswith(b'\n'):
+        chunk = connection.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    try:
+        request = json.loads(data.decode('utf-8'))
+    except ValueError:
+        return False
+    if type(request) != dict or request.get("Token") != token or request.get("Version") != DaemonProtocolVersion:
+        send_daemon_response(connection, {"Status": "Denied"})
+        return False
+    command = request.get("Command")
+    if command == "Stop":
+        print("Prebuild: Stopping daemon")
+        send_daemon_response(connection, {"Status": "Ok"})
+        return True
+    if command != "Build":
+        send_daemon_response(connection, {"Status": "Unknown"})
+        return False
+    # If we kept running while the plugin is built for another engine version, we'd undo the changes of that build
+    if request.get("EngineVersion") != EngineVersion:
+        print("Prebuild: Stopping daemon for UE " + EngineVersion + " because the plugin is being built for UE " + str(request.get("EngineVersion")))
+        send_daemon_response(connection, {"Status": "Stopped"})
+        return True
+    stdout = sys.stdout
+    capture = OutputCapture(stdout)
+    sys.stdout = capture
+    try:
+        exit_code = run_daemon_pass(fingerprint, index_fingerprint, False)
+        if exit_code == 0:
+            print_summary()
+    finally:
+        sys.stdout = stdout
+    output = u"".join(DaemonPendingOutput) + capture.get_text()
+    DaemonPendingOutput = []
+    send_daemon_response(connection, {"Status": "Ok", "Output": output, "ExitCode": exit_code})
+    return False
+
+def write_daemon_descriptor(descriptor):
+    import json
+    if not os.path.isdir(PrebuildIntermediateDir):
+        os.makedirs(PrebuildIntermediateDir)
+    temp_path = DaemonPath + "." + str(os.getpid()) + ".tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(descriptor, f)
+    replace_file(temp_path, DaemonPath)
+
+def read_daemon_descriptor():
+    import json
+    try:
+        with open(DaemonPath) as f:
+            descriptor = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+    if type(descriptor) != dict or descriptor.get("Version") != DaemonProtocolVersion:
+        return None
+    return descriptor
+
+def remove_daemon_descriptor():
+    # Don't remove the descriptor of another daemon that has since replaced this one
+    descriptor = read_daemon_descriptor()
+    if descriptor != None and descriptor.get("Pid") == os.getpid():
+        try:
+            os.remove(DaemonPath)
+        except OSError:
+            pass
+
+def run_daemon(header_paths):
+    import select
+    import socket
+    import binascii
+    index_fingerprint = get_index_fingerprint(header_paths)
+    fingerprint = get_scan_fingerprint(header_paths, index_fingerprint)
+    if PrebuildConfig.UseScanCache:
+        load_scan_cache(fingerprint, index_fingerprint)
+    inputs = get_daemon_inputs(header_paths)
+    exit_code = run_daemon_pass(fingerprint, index_fingerprint, False)
+    if exit_code != 0:
+        sys.exit(exit_code)
+    print_summary()
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(8)
+    token = binascii.hexlify(os.urandom(16)).decode('ascii')
+    write_daemon_descriptor({
+        "Version": DaemonProtocolVersion,
+        "Pid": os.getpid(),
+        "Port": listener.getsockname()[1],
+        "Token": token,
+        "EngineVersion": EngineVersion
+    })
+    print("Prebuild: Daemon is watching " + str(len(DaemonSnapshot)) + " source files for UE " + EngineVersion + " (stop it with --stop-daemon)")
+    try:
+        while True:
+            readable = select.select([listener], [], [], PrebuildConfig.DaemonPollInterval)[0]
+            if get_daemon_inputs(header_paths) != inputs:
+                print("Prebuild: Stopping daemon because the prebuild scripts or headers changed")
+                break
+            if readable:
+                connection = listener.accept()[0]
+                try:
+                    if handle_daemon_request(connection, token, fingerprint, index_fingerprint):
+                        break
+                except (socket.error, socket.timeout) as e:
+                    print("WARNING: Daemon request failed: " + str(e))
+                finally:
+                    connection.close()
+            else:
+                stdout = sys.stdout
+                capture = OutputCapture(stdout)
+                sys.stdout = capture
+                try:
+                    run_daemon_pass(fingerprint, index_fingerprint, True)
+                finally:
+                    sys.stdout = stdout
+                if len(capture.parts) > 0:
+                    DaemonPendingOutput.append(capture.get_text())
+    except KeyboardInterrupt:
+        print("Prebuild: Stopping daemon")
+    finally:
+        remove_daemon_descriptor()
+        listener.close()
+
+# Sends a request to the running daemon, returning its response (or None if there's no daemon that can handle it)
+def send_daemon_request(command):
+    import json
+    import socket
+    descriptor = read_daemon_descriptor()
+    if descriptor == None:
+        return None
+    request = {"Version": DaemonProtocolVersion, "Token": descriptor.get("Token"), "Command": command, "EngineVersion": EngineVersion}
+    try:
+        connection = socket.create_connection(("127.0.0.1", descriptor.get("Port")), DaemonConnectTimeout)
+        try:
+            connection.settimeout(DaemonRequestTimeout)
+            connection.sendall(json.dumps(request).encode('utf-8') + b'\n')
+            data = b''
+            while True:
+                chunk = connection.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+        finally:
+            connection.close()
+        response = json.loads(data.decode('utf-8'))
+    except (socket.error, socket.timeout, TypeError, ValueError):
+        return None
+    if type(response) != dict or response.get("Status") != "Ok":
+        return None
+    return response
+
+def main():
+    global StartTime, CheckOnly, LogLineChanges, MaxViolations
+    StartTime = time.time()
+    read_environment()
+    init_config()
+    args = parse_args()
+    set_log_level(PrebuildLogLevel or PrebuildConfig.LogLevel)
+    if args.stop_daemon:
+        if send_daemon_request("Stop") == None:
+            print("Prebuild: No daemon is running")
+        sys.exit(0)
+    set_engine_version(*deduce_engine_version())
+    if args.project:
+        run_project(args.project)
+        sys.exit(0)
+    header_paths = [path.replace("{PluginName}", PluginName) for path in PrebuildConfig.CustomPrebuildHeaders]
+    # Nothing to do if a project-wide prebuild already processed this plugin earlier in the build
+    if not (args.check or args.matrix or args.daemon):
+        exit_if_processed_by_project(header_paths)
+    # Let the daemon do the work if it's running, since its rules and scan cache are already loaded
+    if PrebuildConfig.UseDaemon and not (args.check or args.matrix or args.daemon):
+        daemon_response = send_daemon_request("Build")
+        if daemon_response != None:
+            sys.stdout.write(daemon_response.get("Output") or "")
+            sys.exit(daemon_response.get("ExitCode") or 0)
+    # Wait for any other prebuild of this plugin to finish, and use its result if it had the same fingerprint
+    # Prebuilds of only some of the files (see --files) wait, but don't share their results.
+    shared_result_fingerprint = None
+    if not (args.check or args.matrix or args.daemon):
+        if not args.files:
+            shared_result_fingerprint = get_scan_fingerprint(header_paths)
+        if acquire_prebuild_lock():
+            exit_if_processed_by_project(header_paths)
+            shared_output = shared_result_fingerprint and read_shared_result(shared_result_fingerprint)
+            if shared_output != None:
+                if LogLevel != "quiet":
+                    print("Prebuild: Reusing the result of the prebuild of " + PluginName + " that finished while waiting for it")
+                sys.stdout.write(shared_output)
+                sys.exit(0)
+        if shared_result_fingerprint != None:
+            sys.stdout = OutputCapture(sys.stdout)
+
+    # First make sure encodings list only has valid entries
+    phase_start_time = time.time()
+    check_encodings()
+    compile_rules()
+    phase_start_time = add_phase_time(PhaseTimes, "Startup", phase_start_time)
+
+    if args.matrix:
+        run_matrix(args.matrix, args.matrix_output, args.summary_only, header_paths)
+        sys.exit(0)
+    if args.check:
+        # Check mode reports which files need changes instead of logging each changed line
+        CheckOnly = True
+        LogLineChanges = False
+        MaxViolations = args.max_violations
+
+    # Parse prebuild header files
+    # Check mode doesn't write anything, including the header cache
+    parse_prebuild_headers(header_paths, not CheckOnly)
+    compile_macro_replacements()
+    phase_start_time = add_phase_time(PhaseTimes, "HeaderParsing", phase_start_time)
+    if args.daemon:
+        run_daemon(header_paths)
+        sys.exit(0)
+
+    # Load the scan cache so we can skip files that are already up to date
+    if PrebuildConfig.UseScanCache:
+        index_fingerprint = get_index_fingerprint(header_paths)
+        scan_fingerprint = shared_result_fingerprint or get_scan_fingerprint(header_paths, index_fingerprint)
+        load_scan_cache(scan_fingerprint, index_fingerprint)
+    phase_start_time = add_phase_time(PhaseTimes, "ScanCache", phase_start_time)
+
+    # Find the source files that need processing
+    # The build may already know which files changed, in which case there's no need to search for them
+    source_files = []
+    process_dirs = [os.path.join(PluginDir, dir.replace("{PluginName}", PluginName)) for dir in PrebuildConfig.ProcessDirs]
+    if args.files:
+        collect_listed_files(read_file_list(args.files), process_dirs, source_files)
+    else:
+        for dir in process_dirs:
+            collect_files_recursive(dir, source_files)
+    Totals["SourceFiles"] = len(source_files)
+    phase_start_time = add_phase_time(PhaseTimes, "Walking", phase_start_time)
+    if PrebuildConfig.UseScanCache:
+        source_files = [path for path in source_files if not try_skip_cached_file(path)]
+        Totals["ScanCacheSkipped"] = Totals["SourceFiles"] - len(source_files)
+    phase_start_time = add_phase_time(PhaseTimes, "ScanCache", phase_start_time)
+
+    # Process replacements in source files
+    process_files(source_files)
+    phase_start_time = add_phase_time(PhaseTimes, "Processing", phase_start_time)
+
+    # Check mode uses the scan cache to skip files that are known to be up to date, but never updates it
+    # A cache saved for another engine version is only used for its marker indexes. Builds of only some of the files
+    # keep it as is, so the next full build can still use the marker indexes of the others.
+    if PrebuildConfig.UseScanCache and not CheckOnly and not (args.files and MarkerIndex):
+        if args.files:
+            keep_unvisited_scan_cache_entries()
+        save_scan_cache(scan_fingerprint, index_fingerprint)
+    add_phase_time(PhaseTimes, "ScanCache", phase_start_time)
+    if PrebuildConfig.WriteChangeDiff and not CheckOnly:
+        write_change_diff()
+    print_summary()
+    if shared_result_fingerprint != None:
+        write_shared_result(shared_result_fingerprint, sys.stdout.get_text())
+    if PrebuildProfile:
+        write_profile()
+    if CheckOnly and Totals["Changed"] > 0:
+        sys.exit(CheckFailedExitCode)